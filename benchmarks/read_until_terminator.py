@@ -0,0 +1,64 @@
+"""
+Compare the CPU cost per response of the byte-at-a-time read_until_terminator() that the drivers used to implement
+with the chunked equipment.communication.LineReader.
+
+The fake serial port below already holds each complete response, as a real port does once a reply has arrived, so the
+times measure only the Python-level cost of reading.
+
+Usage: python benchmarks/read_until_terminator.py [number of responses]
+"""
+from __future__ import division, print_function
+import sys
+import timeit
+
+from equipment.communication import LineReader
+
+
+class FakeSerial(object):
+    """
+    This port receives the same response again as soon as the previous one has been read completely.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.position = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.response) - self.position
+
+    def read(self, size=1):
+        chunk = self.response[self.position:self.position + size]
+        self.position = (self.position + len(chunk)) % len(self.response)
+        return chunk
+
+
+def byte_at_a_time(port, termination):
+    characters = []
+    while True:
+        character = port.read()
+        if not character:
+            break
+        elif character == termination:
+            break
+        else:
+            characters.append(character)
+    return ''.join(characters).rstrip()
+
+
+def main(n_responses=10000, termination='\r'):
+    responses = {'SNAP? 1,2': '1.23456e-06,-7.89012e-07',
+                 '*IDN?': 'Stanford_Research_Systems,SR830,s/n12345,ver1.07 ',
+                 'TRCA? 1,0,8': ','.join(['1.23456e-06'] * 8) + ','}
+    for name, response in responses.items():
+        port = FakeSerial(response + termination)
+        old = timeit.timeit(lambda: byte_at_a_time(port, termination), number=n_responses)
+        port = FakeSerial(response + termination)
+        reader = LineReader(port, termination)
+        new = timeit.timeit(lambda: reader.readline().rstrip(), number=n_responses)
+        print('{:12s} {:3d} bytes: byte-at-a-time {:7.2f} us, chunked {:7.2f} us per response ({:.0f}x)'.format(
+            name, len(response) + len(termination), 1e6 * old / n_responses, 1e6 * new / n_responses, old / new))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+Find the smallest safe pacing interval for a SIM module by sending the same query repeatedly at a series of intervals
+and counting the responses that were dropped, garbled, or not the expected value. This needs hardware: the mainframe is
+attached without a reset.
+
+Usage: python benchmarks/sim_pacing.py /dev/ttyUSB0 --port 1 [--query RVAL?] [--intervals 0 1e-4 1e-3 1e-2]
+       [--repeats 100] [--transport connect] [--numeric]
+"""
+from __future__ import division, print_function
+import argparse
+import time
+
+from equipment.srs.sim import SIM900
+
+
+def measure(module, query, repeats, numeric):
+    module.pacer.reset_statistics()
+    invalid = 0
+    start = time.time()
+    for n in range(repeats):
+        response = module.send_and_receive(query)
+        if numeric:
+            try:
+                float(response)
+            except ValueError:
+                invalid += 1
+    elapsed = (time.time() - start) / repeats
+    return elapsed, invalid
+
+
+def main(serial_device, port, query, intervals, repeats, transport, numeric):
+    mainframe = SIM900(serial_device, reset=False, autodetect=False, transport=transport)
+    module = mainframe.module(port)
+    if module is None:
+        raise ValueError("No module in port {}".format(port))
+    mainframe.pacer.interval = 0  # The module's communication_delay sets the interval for its messages.
+    print('{} in port {}, {} transport, {:d} repeats of {}'.format(module, port, transport, repeats, query))
+    for interval in intervals:
+        module.communication_delay = interval
+        elapsed, invalid = measure(module, query, repeats, numeric)
+        pacer = module.pacer
+        print('interval {:8.2f} ms: {:7.2f} ms per query, {:7.2f} ms waited, {:d} dropped, {:d} garbled, '
+              '{:d} invalid'.format(1e3 * interval, 1e3 * elapsed, 1e3 * pacer.waited / repeats, pacer.dropped,
+                                    pacer.garbled, invalid))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('serial_device')
+    parser.add_argument('--port', required=True)
+    parser.add_argument('--query', default='*IDN?')
+    parser.add_argument('--intervals', type=float, nargs='+', default=[0, 1e-4, 1e-3, 1e-2],
+                        help='the pacing intervals to try, in seconds')
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--transport', choices=SIM900.transports, default='connect')
+    parser.add_argument('--numeric', action='store_true', help='count responses that are not numbers as invalid')
+    args = parser.parse_args()
+    main(args.serial_device, args.port, args.query, args.intervals, args.repeats, args.transport, args.numeric)
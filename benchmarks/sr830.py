@@ -0,0 +1,97 @@
+"""
+Measure the wall time and the number of lines sent for common SR830 operations, using the emulator in
+equipment.srs.emulator instead of hardware.
+
+Usage: python benchmarks/sr830.py [--baud-rate 19200] [--latency 0.005] [--repeats 5]
+"""
+from __future__ import division, print_function
+import argparse
+import time
+import numpy as np
+
+from equipment.srs.lockin import SR830
+from equipment.srs.emulator import SR830Emulator
+
+
+def measure(lockin, function, repeats):
+    emulator = lockin.serial
+    emulator.reset_statistics()
+    start = time.time()
+    for n in range(repeats):
+        function()
+    elapsed = (time.time() - start) / repeats
+    return elapsed, emulator.lines_received / repeats, (emulator.bytes_received + emulator.bytes_sent) / repeats
+
+
+def report(name, result):
+    elapsed, lines, n_bytes = result
+    print('{:40s} {:9.2f} ms {:7.1f} lines {:9.0f} bytes'.format(name, 1e3 * elapsed, lines, n_bytes))
+
+
+def individual_settings(lockin):
+    lockin.snap(3, 4)
+    return dict((name, getattr(lockin, name)) for name in lockin.setting_queries)
+
+
+def individual_status(lockin):
+    return [getattr(lockin, name) for name in ('no_scan_in_progress', 'no_command_in_progress', 'any_error_status',
+                                               'any_lockin_status', 'interface_output_buffer_nonempty',
+                                               'any_standard_status', 'service_request', 'input_queue_overflow',
+                                               'output_queue_overflow', 'execution_or_parameter_error',
+                                               'illegal_command', 'key_pressed', 'power_on', 'battery_error',
+                                               'ram_error', 'rom_error', 'gpib_error', 'dsp_error', 'math_error',
+                                               'input_overload', 'filter_overload', 'output_overload',
+                                               'reference_unlock', 'frequency_range_switch',
+                                               'time_constant_changed', 'triggered')]
+
+
+def point_by_point_sweep(lockin, frequencies):
+    data = []
+    settling_time = lockin.settling_time()
+    for frequency in frequencies:
+        lockin.reference_frequency = frequency
+        time.sleep(settling_time)
+        data.append(lockin.snap(1, 2, 3, 4, 9))
+    return data
+
+
+def main(baud_rate=19200, latency=5e-3, repeats=5):
+    lockin = SR830(SR830Emulator(baud_rate=baud_rate, latency=latency))
+    lockin.time_constant = 0  # Make settling negligible so that only communication is measured.
+    settling = SR830(SR830Emulator(baud_rate=baud_rate, latency=latency))
+    settling.time_constant = 5  # 3 ms, so that settling takes about as long as the communication.
+    cached = SR830(SR830Emulator(baud_rate=baud_rate, latency=latency), cache_settings=True)
+    cached.read_settings()
+    frequencies = np.logspace(1, 4, 50)
+    n_points = 1000
+    lockin.acquire_storage(n_points, 13)
+    print('Baud rate {:d}, latency {:.1f} ms, mean of {:d} repeats'.format(baud_rate, 1e3 * latency, repeats))
+    report('snap()', measure(lockin, lambda: lockin.snap(1, 2), repeats))
+    report('state', measure(lockin, lambda: lockin.state, repeats))
+    report('one query per setting', measure(lockin, lambda: individual_settings(lockin), repeats))
+    report('one cached read per setting', measure(cached, lambda: individual_settings(cached), repeats))
+    report('read_status()', measure(lockin, lockin.read_status, repeats))
+    report('one query per status bit', measure(lockin, lambda: individual_status(lockin), repeats))
+    report('{:d}-point sweep, point by point'.format(frequencies.size),
+           measure(lockin, lambda: point_by_point_sweep(lockin, frequencies), repeats))
+    report('{:d}-point frequency_sweep()'.format(frequencies.size),
+           measure(lockin, lambda: lockin.frequency_sweep(frequencies), repeats))
+    report('{:d}-point sweep, point by point, 3 ms'.format(frequencies.size),
+           measure(settling, lambda: point_by_point_sweep(settling, frequencies), repeats))
+    report('{:d}-point frequency_sweep(), 3 ms'.format(frequencies.size),
+           measure(settling, lambda: settling.frequency_sweep(frequencies), repeats))
+    report('{:d}-point read, TRCA? per channel'.format(n_points),
+           measure(lockin, lambda: [lockin.read_buffer_ascii(channel, 0, n_points) for channel in (1, 2)], repeats))
+    report('{:d}-point read, read_buffers()'.format(n_points),
+           measure(lockin, lambda: lockin.read_buffers(0, n_points), repeats))
+    report('{:d}-point read, read_buffers() TRCL?'.format(n_points),
+           measure(lockin, lambda: lockin.read_buffers(0, n_points, long_format=True), repeats))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baud-rate', type=int, default=19200)
+    parser.add_argument('--latency', type=float, default=5e-3, help='the emulated latency per line in seconds')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    main(args.baud_rate, args.latency, args.repeats)
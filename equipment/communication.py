@@ -0,0 +1,171 @@
+"""
+This module contains code shared by the instrument classes for communicating over serial ports.
+"""
+from __future__ import division
+import time
+import warnings
+
+
+class LineReader(object):
+    """
+    This class reads terminated responses from a serial port in chunks instead of one byte at a time.
+
+    Each read requests every byte that the port has already received, so a response usually costs a single call. Bytes
+    that arrive after a terminator are kept for the next call, so the reader must be the only consumer of the port.
+    """
+
+    def __init__(self, serial, terminator):
+        self.serial = serial
+        self.terminator = terminator
+        self._buffer = b''
+
+    def _in_waiting(self):
+        try:
+            return self.serial.in_waiting
+        except AttributeError:  # Versions of pyserial before 3.0
+            return self.serial.inWaiting()
+
+    def _fill(self):
+        chunk = self.serial.read(max(1, self._in_waiting()))
+        self._buffer += chunk
+        return bool(chunk)
+
+    def readline(self, block=True):
+        """
+        Return the next response with its terminator removed. If the port times out, issue a warning and return
+        whatever was received.
+
+        :param block: if False, read only bytes that have already arrived and return None if they do not complete a
+          response; the partial response is kept for the next call.
+        """
+        start = 0
+        while True:
+            index = self._buffer.find(self.terminator, start)
+            if index >= 0:
+                line = self._buffer[:index]
+                self._buffer = self._buffer[index + len(self.terminator):]
+                return line
+            start = max(0, len(self._buffer) - len(self.terminator) + 1)
+            if not block:
+                n_bytes = self._in_waiting()
+                if not n_bytes:
+                    return None
+                self._buffer += self.serial.read(n_bytes)
+            elif not self._fill():  # self.serial has timed out.
+                warnings.warn("Serial port timed out while reading.")
+                line, self._buffer = self._buffer, b''
+                return line
+
+    def wait(self):
+        """
+        Block until at least one unread byte is buffered, and return False if the port times out first.
+        """
+        return bool(self._buffer) or self._fill()
+
+    def read(self, n_bytes):
+        """
+        Return exactly n_bytes, or fewer if the port times out.
+        """
+        while len(self._buffer) < n_bytes:
+            if not self._fill():
+                break
+        data = self._buffer[:n_bytes]
+        self._buffer = self._buffer[n_bytes:]
+        return data
+
+    def clear(self):
+        """
+        Discard any bytes that have been read from the port but not yet returned.
+        """
+        self._buffer = b''
+
+
+class Pacer(object):
+    """
+    This class enforces a minimum quiet interval on a serial line between the end of one message and the start of the
+    next, for devices that drop or garble messages that arrive too close together.
+
+    The end of a message is the time when its last byte leaves the host, estimated from the message length and the baud
+    rate, or the time when its response arrived. wait() sleeps only for the part of the interval that has not already
+    passed, so messages that are spaced by other work, such as waiting for a response, are not delayed at all.
+
+    The statistics attributes count messages and responses, the total time spent waiting, and the responses that were
+    empty (dropped) or contained non-printable characters (garbled), so the smallest safe interval can be found
+    empirically.
+    """
+
+    def __init__(self, interval, bits_per_byte=10):
+        self.interval = interval
+        self.bits_per_byte = bits_per_byte
+        self._quiet = 0  # The time when the line became quiet.
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        self.messages = 0
+        self.responses = 0
+        self.dropped = 0
+        self.garbled = 0
+        self.waited = 0
+
+    def wait(self, interval=None):
+        """
+        Sleep until the interval has passed since the end of the last message or response.
+
+        :param interval: a longer interval required by the device that the next message is for; the interval attribute
+            is always the minimum.
+        """
+        if interval is None or interval < self.interval:
+            interval = self.interval
+        remaining = self._quiet + interval - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+            self.waited += remaining
+
+    def sent(self, n_bytes, baud_rate=None):
+        """
+        Record that a message of n_bytes has just been written. If baud_rate is None, ignore the transmission time.
+        """
+        self._quiet = time.time()
+        if baud_rate:
+            self._quiet += n_bytes * self.bits_per_byte / baud_rate
+        self.messages += 1
+
+    def received(self, response=None):
+        """
+        Record that the given response has just been read. Its arrival means that the message that prompted it has been
+        transmitted. If response is None, record only the time, without counting a response; use this for data that is
+        not a single response, such as a block that contains several.
+        """
+        self._quiet = time.time()
+        if response is None:
+            return
+        self.responses += 1
+        if not response:
+            self.dropped += 1
+        elif any(not ' ' <= character <= '~' for character in response):
+            self.garbled += 1
+
+
+def wait_for(condition, timeout, exception, message, initial_interval=1e-3, maximum_interval=0.1, growth=1.5):
+    """
+    Call condition() until it returns True, sleeping between calls for an interval that starts at initial_interval and
+    grows by the factor growth up to maximum_interval. This answers quickly when the condition is met soon without
+    flooding the port when it is not.
+
+    :param condition: a function that takes no arguments and returns a bool.
+    :param timeout: the maximum time to wait, in seconds; if None, wait forever.
+    :param exception: the exception class to raise when the timeout expires.
+    :param message: the exception message.
+    """
+    if timeout is not None:
+        deadline = time.time() + timeout
+    interval = initial_interval
+    while not condition():
+        if timeout is None:
+            time.sleep(interval)
+        else:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise exception(message)
+            time.sleep(min(interval, remaining))
+        interval = min(interval * growth, maximum_interval)
@@ -3,6 +3,8 @@ Jackson Labs Fury
 """
 import serial
 
+from equipment.communication import LineReader
+
 
 class Fury(object):
 
@@ -12,6 +14,7 @@ class Fury(object):
 
     def __init__(self, serial_device, timeout=1):
         self.serial = serial.Serial(serial_device, baudrate=self.baud_rate, timeout=timeout, rtscts=True)
+        self.reader = LineReader(self.serial, self.termination)
 
     def send(self, message):
         self.serial.write(message + self.termination)
@@ -21,17 +24,7 @@ class Fury(object):
         #return self.read_until_terminator()
 
     def read_until_terminator(self):
-        characters = []
-        while True:
-            character = self.serial.read()
-            if not character:  # self.serial has timed out.
-                print("Serial port timed out while reading.")
-                break
-            elif character == self.termination:
-                break
-            else:
-                characters.append(character)
-        return ''.join(characters).rstrip()  # Some commands seem to return both a space and carriage return.
+        return self.reader.readline().rstrip()  # Some commands seem to return both a space and carriage return.
 
     def send_and_receive(self, message):
         self.send(message)
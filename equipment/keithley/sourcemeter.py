@@ -1,13 +1,15 @@
 import serial
-import warnings
 import numpy as np
 
+from equipment.communication import LineReader
+
 class Keithley2400(object):
     termination = '\r'
     name = "sourcemeter"
 
     def __init__(self, serial_device, baud_rate=9600, timeout=1):
         self.serial = serial.Serial(serial_device, baudrate=baud_rate, timeout=timeout, rtscts=True)
+        self.reader = LineReader(self.serial, self.termination)
 
     def send(self, message):
         self.serial.write(message + self.termination)
@@ -17,17 +19,7 @@ class Keithley2400(object):
         return self.read_until_terminator()
 
     def read_until_terminator(self):
-        characters = []
-        while True:
-            character = self.serial.read()
-            if not character:  # self.serial has timed out.
-                warnings.warn("Serial port timed out while reading.")
-                break
-            elif character == self.termination:
-                break
-            else:
-                characters.append(character)
-        return ''.join(characters).rstrip()  # Some commands seem to return both a space and carriage return.
+        return self.reader.readline().rstrip()  # Some commands seem to return both a space and carriage return.
 
     def send_and_receive(self, message):
         self.send(message)
@@ -0,0 +1,402 @@
+"""
+This module contains an in-process emulator of an SR830 lock-in amplifier that behaves like a serial.Serial object, so
+that the SR830 class can be used and benchmarked without hardware:
+
+    lockin = SR830(SR830Emulator(latency=5e-3))
+
+The emulator parses the same commands as the SR830 and models the time taken by the serial line: each line is
+transmitted at the baud rate, the lines are executed in turn with each taking the given latency, and each response
+becomes available byte by byte as it is transmitted back. It counts lines and bytes in both directions so that round
+trips can be measured.
+
+The input signal is the complex function signal(frequency), in volts rms, plus optional Gaussian noise. The output
+filter is not modeled: the outputs follow the signal immediately. Fast mode streaming is not emulated.
+"""
+from __future__ import division
+import time
+import threading
+import numpy as np
+
+from equipment.srs.lockin import SR830
+
+
+def single_pole_signal(frequency, amplitude=1e-3, corner_frequency=1e3):
+    """
+    This is the default input signal: a single-pole low-pass response.
+    """
+    return amplitude / (1 + 1j * frequency / corner_frequency)
+
+
+class SR830Emulator(object):
+
+    # These are the settings after *RST, by command mnemonic.
+    default_settings = {'PHAS': 0.,
+                        'FMOD': 1,
+                        'FREQ': 1000.,
+                        'RSLP': 0,
+                        'HARM': 1,
+                        'SLVL': 1.,
+                        'ISRC': 0,
+                        'IGND': 0,
+                        'ICPL': 0,
+                        'ILIN': 0,
+                        'SENS': 26,
+                        'RMOD': 1,
+                        'OFLT': 10,
+                        'OFSL': 1,
+                        'SYNC': 0,
+                        'SRAT': 4,
+                        'SEND': 1,
+                        'TSTR': 0,
+                        'LOCL': 0,
+                        'FAST': 0}
+
+    float_settings = frozenset(['PHAS', 'FREQ', 'SLVL'])
+
+    identification = 'Stanford_Research_Systems,SR830,s/n00000,ver1.07 '
+
+    def __init__(self, baud_rate=19200, latency=0., timeout=1, signal=single_pole_signal, noise=0.,
+                 auto_function_duration=0.1, bits_per_byte=10):
+        """
+        :param baud_rate: the simulated baud rate.
+        :param latency: the time in seconds that the lock-in takes to execute each line.
+        :param timeout: the read timeout in seconds, as for serial.Serial.
+        :param signal: a function that returns the complex input signal in volts rms at a given reference frequency.
+        :param noise: the rms noise in volts added to each of X and Y.
+        :param auto_function_duration: the time in seconds that the auto functions keep a command in progress.
+        :param bits_per_byte: the number of bits transmitted per byte, including start and stop bits.
+        """
+        self.baud_rate = baud_rate
+        self.latency = latency
+        self.timeout = timeout
+        self.signal = signal
+        self.noise = noise
+        self.auto_function_duration = auto_function_duration
+        self.bits_per_byte = bits_per_byte
+        self._lock = threading.Lock()
+        self._input = ''
+        self._output = []  # A list of [transmission start time, bytes] pairs.
+        # These are the times at which the input line, the command parser, and the output line become free.
+        self._input_free = self._execution_free = self._output_free = 0.
+        self.reset_statistics()
+        self.reset()
+
+    def reset(self):
+        """
+        Restore the default settings and clear the status registers and data buffers, as *RST does.
+        """
+        self.settings = dict(self.default_settings)
+        self.displays = {1: (0, 0), 2: (0, 0)}
+        self.standard_event_status = 0
+        self.error_status = 0
+        self._command_done = 0.
+        self._clear_storage()
+
+    def reset_statistics(self):
+        self.lines_received = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    # Serial port interface
+
+    def _transmit_time(self, n_bytes):
+        return n_bytes * self.bits_per_byte / self.baud_rate
+
+    def write(self, data):
+        with self._lock:
+            arrival_time = max(time.time(), self._input_free) + self._transmit_time(len(data))
+            self._input_free = arrival_time
+            self.bytes_received += len(data)
+            self._input += data
+            while True:
+                end = min([i for i in (self._input.find('\r'), self._input.find('\n')) if i >= 0] or [-1])
+                if end < 0:
+                    break
+                line, self._input = self._input[:end].strip(), self._input[end + 1:]
+                if not line:
+                    continue
+                self.lines_received += 1
+                # Lines are executed in order, after any command in progress, and their responses are sent in order.
+                execution_time = max(arrival_time, self._execution_free, self._command_done) + self.latency
+                self._execution_free = execution_time
+                response = self._execute_line(line, execution_time)
+                if response:
+                    start = max(execution_time, self._output_free)
+                    self._output.append([start, response])
+                    self._output_free = start + self._transmit_time(len(response))
+        return len(data)
+
+    # Return the number of bytes that have been transmitted by the given time but not yet read.
+    def _available(self, now):
+        byte_time = self._transmit_time(1)
+        total = 0
+        for start, data in self._output:
+            n = min(len(data), int((now - start) / byte_time))
+            total += max(n, 0)
+            if n < len(data):
+                break
+        return total
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            return self._available(time.time())
+
+    def read(self, size=1):
+        """
+        Return size bytes, or fewer if the timeout expires first, as serial.Serial does.
+        """
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        while True:
+            now = time.time()
+            with self._lock:
+                available = self._available(now)
+                if available >= size or (deadline is not None and now >= deadline):
+                    return self._take(min(size, available))
+                # Sleep until the remaining bytes should have arrived.
+                wait = (size - available) * self._transmit_time(1)
+                if self._output:
+                    wait = max(wait, self._output[0][0] - now)
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            time.sleep(max(wait, 1e-4))
+
+    def _take(self, size):
+        byte_time = self._transmit_time(1)
+        data = []
+        while size:
+            start, chunk = self._output[0]
+            chunk = chunk[:size]
+            data.append(chunk)
+            size -= len(chunk)
+            if len(chunk) == len(self._output[0][1]):
+                self._output.pop(0)
+            else:
+                self._output[0] = [start + len(chunk) * byte_time, self._output[0][1][len(chunk):]]
+        data = ''.join(data)
+        self.bytes_sent += len(data)
+        return data
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._output = []
+
+    def close(self):
+        pass
+
+    # Command parsing
+
+    def _execute_line(self, line, now):
+        responses = []
+        for command in line.split(';'):
+            command = command.strip()
+            if not command:
+                continue
+            if '?' in command:
+                mnemonic, arguments = command.split('?', 1)
+                query = True
+            else:
+                mnemonic, arguments = (command.split(None, 1) + [''])[:2]
+                query = False
+            mnemonic = mnemonic.strip().upper()
+            arguments = [a.strip() for a in arguments.split(',') if a.strip()]
+            try:
+                response = self._execute(mnemonic, arguments, query, now)
+            except (AttributeError, KeyError, ValueError, IndexError):
+                self.standard_event_status |= 1 << 5  # illegal command
+                continue
+            if isinstance(response, _Binary):
+                responses.append(str(response))
+            elif response is not None:
+                responses.append(response + '\r')
+        return ''.join(responses)
+
+    def _execute(self, mnemonic, arguments, query, now):
+        if mnemonic in self.settings:
+            if query:
+                value = self.settings[mnemonic]
+                return '{:.6g}'.format(value) if mnemonic in self.float_settings else '{:d}'.format(value)
+            if mnemonic in self.float_settings:
+                value = float(arguments[0])
+                if mnemonic == 'PHAS':
+                    value = 180 - (180 - value) % 360
+            else:
+                value = int(arguments[0])
+            if mnemonic == 'SRAT' or mnemonic == 'SEND':
+                self._clear_storage()
+            self.settings[mnemonic] = value
+            return None
+        handler = getattr(self, '_command_' + mnemonic.lstrip('*'))
+        return handler(arguments, query, now)
+
+    def _bit_query(self, register, arguments):
+        if arguments:
+            return '{:d}'.format((register >> int(arguments[0])) & 1)
+        return '{:d}'.format(register)
+
+    # Signal model
+
+    def _outputs(self, n=None):
+        """
+        Return X and Y, as floats or as arrays of n noisy samples.
+        """
+        value = (self.signal(self.settings['FREQ'] * self.settings['HARM']) *
+                 np.exp(-1j * np.radians(self.settings['PHAS'])))
+        if n is None:
+            noise = self.noise * np.random.randn(2)
+            return value.real + noise[0], value.imag + noise[1]
+        return (value.real + self.noise * np.random.randn(n),
+                value.imag + self.noise * np.random.randn(n))
+
+    def _parameter(self, code, X, Y):
+        return {1: X,
+                2: Y,
+                3: np.hypot(X, Y),
+                4: np.degrees(np.arctan2(Y, X)),
+                5: 0.,
+                6: 0.,
+                7: 0.,
+                8: 0.,
+                9: self.settings['FREQ'],
+                10: self._display(1, X, Y),
+                11: self._display(2, X, Y)}[code]
+
+    def _display(self, channel, X, Y):
+        display = self.displays[channel][0]
+        if display == 0:
+            return X if channel == 1 else Y
+        if display == 1:
+            return np.hypot(X, Y) if channel == 1 else np.degrees(np.arctan2(Y, X))
+        return 0. * X
+
+    # Data storage model
+
+    def _clear_storage(self):
+        self._stored = 0
+        self._storage_started = None
+
+    def _stored_points(self, now):
+        stored = self._stored
+        if self._storage_started is not None:
+            rate = SR830.sample_rate_integer_to_hertz.get(self.settings['SRAT'], 0.)
+            stored += int((now - self._storage_started) * rate)
+        # In one shot mode storage stops when the buffer is full, and in loop mode it stays full.
+        return min(stored, SR830.maximum_stored_points)
+
+    def _buffer(self, arguments, now):
+        channel, start, n = [int(a) for a in arguments]
+        if start + n > self._stored_points(now) or channel not in (1, 2):
+            raise ValueError("Invalid buffer range.")
+        X, Y = self._outputs(n)
+        return np.asarray(self._display(channel, X, Y), dtype=np.float64)
+
+    # Commands that are not simple settings
+
+    def _command_IDN(self, arguments, query, now):
+        return self.identification
+
+    def _command_RST(self, arguments, query, now):
+        self.reset()
+
+    def _command_CLS(self, arguments, query, now):
+        self.standard_event_status = 0
+        self.error_status = 0
+
+    def _command_DDEF(self, arguments, query, now):
+        if query:
+            return '{:d},{:d}'.format(*self.displays[int(arguments[0])])
+        self.displays[int(arguments[0])] = (int(arguments[1]), int(arguments[2]) if len(arguments) > 2 else 0)
+
+    def _command_OUTP(self, arguments, query, now):
+        return '{:.6g}'.format(self._parameter(int(arguments[0]), *self._outputs()))
+
+    def _command_OAUX(self, arguments, query, now):
+        return '0'
+
+    def _command_SNAP(self, arguments, query, now):
+        X, Y = self._outputs()
+        return ','.join(['{:.6g}'.format(self._parameter(int(a), X, Y)) for a in arguments])
+
+    def _command_STB(self, arguments, query, now):
+        status = 1  # No scan in progress.
+        if now >= self._command_done:
+            status |= 1 << 1
+        if self.standard_event_status:
+            status |= 1 << 5
+        return self._bit_query(status, arguments)
+
+    def _command_ESR(self, arguments, query, now):
+        response = self._bit_query(self.standard_event_status, arguments)
+        if arguments:
+            self.standard_event_status &= ~(1 << int(arguments[0]))
+        else:
+            self.standard_event_status = 0
+        return response
+
+    def _command_ERRS(self, arguments, query, now):
+        return self._bit_query(self.error_status, arguments)
+
+    def _command_LIAS(self, arguments, query, now):
+        status = 0
+        if np.hypot(*self._outputs()) > SR830.sensitivities[self.settings['SENS']]:
+            status |= 1 << 2
+        return self._bit_query(status, arguments)
+
+    def _command_TRIG(self, arguments, query, now):
+        pass
+
+    def _auto_function(self, now):
+        self._command_done = now + self.auto_function_duration
+
+    def _command_AGAN(self, arguments, query, now):
+        R = np.hypot(*self._outputs())
+        self.settings['SENS'] = min(int(np.searchsorted(SR830.sensitivities, R / 0.8)), SR830.sensitivities.size - 1)
+        self._auto_function(now)
+
+    def _command_ARSV(self, arguments, query, now):
+        self._auto_function(now)
+
+    def _command_APHS(self, arguments, query, now):
+        self.settings['PHAS'] = float(np.angle(self.signal(self.settings['FREQ'] * self.settings['HARM']), deg=True))
+        self._auto_function(now)
+
+    def _command_AOFF(self, arguments, query, now):
+        self._auto_function(now)
+
+    def _command_STRT(self, arguments, query, now):
+        if self._storage_started is None:
+            self._storage_started = now
+
+    def _command_STRD(self, arguments, query, now):
+        if self._storage_started is None:
+            self._storage_started = now + 0.5
+
+    def _command_PAUS(self, arguments, query, now):
+        self._stored = self._stored_points(now)
+        self._storage_started = None
+
+    def _command_REST(self, arguments, query, now):
+        self._clear_storage()
+
+    def _command_SPTS(self, arguments, query, now):
+        return '{:d}'.format(self._stored_points(now))
+
+    def _command_TRCA(self, arguments, query, now):
+        return ''.join(['{:.6g},'.format(value) for value in self._buffer(arguments, now)])
+
+    def _command_TRCB(self, arguments, query, now):
+        return _Binary(self._buffer(arguments, now).astype(SR830.buffer_binary_dtype).tobytes())
+
+    def _command_TRCL(self, arguments, query, now):
+        mantissa, exponent = np.frexp(self._buffer(arguments, now))
+        points = np.empty(mantissa.size, dtype=SR830.buffer_long_dtype)
+        points['mantissa'] = np.round(mantissa * 2 ** 14)
+        points['exponent'] = np.where(mantissa == 0, 0, exponent - 14 + 124)
+        return _Binary(points.tobytes())
+
+
+class _Binary(str):
+    """
+    A response that is sent without a terminator.
+    """
+    pass
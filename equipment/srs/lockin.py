@@ -1,14 +1,77 @@
 """
 This module contains classes to interface with SRS lock-in amplifiers.
 """
+from __future__ import division
+import math
+import time
+import threading
 import serial
 import warnings
 import numpy as np
+from collections import OrderedDict, namedtuple
+
+from equipment.communication import LineReader, wait_for
+from equipment.stream import RingBuffer
 
 class LockinError(Exception):
     pass
 
 
+class StatusRegister(object):
+    """
+    This is a mixin for the immutable records below, each of which holds one boolean per used bit of a status register.
+    """
+    __slots__ = ()
+
+    # Subclasses list the bit number of each field, in the same order as the fields.
+    bits = ()
+
+    @classmethod
+    def from_byte(cls, byte):
+        return cls(*[bool(int(byte) & (1 << bit)) for bit in cls.bits])
+
+
+class StatusByte(StatusRegister, namedtuple('StatusByte', ['no_scan_in_progress', 'no_command_in_progress',
+                                                             'any_error_status', 'any_lockin_status',
+                                                             'interface_output_buffer_nonempty',
+                                                             'any_standard_status', 'service_request'])):
+    """The serial poll status byte, read with *STB?."""
+    __slots__ = ()
+    bits = (0, 1, 2, 3, 4, 5, 6)
+
+
+class StandardEventStatus(StatusRegister, namedtuple('StandardEventStatus', ['input_queue_overflow',
+                                                                           'output_queue_overflow',
+                                                                           'execution_or_parameter_error',
+                                                                           'illegal_command', 'key_pressed',
+                                                                           'power_on'])):
+    """The standard event status byte, read with *ESR?."""
+    __slots__ = ()
+    bits = (0, 2, 4, 5, 6, 7)
+
+
+class ErrorStatus(StatusRegister, namedtuple('ErrorStatus', ['battery_error', 'ram_error', 'rom_error', 'gpib_error',
+                                                           'dsp_error', 'math_error'])):
+    """The error status byte, read with ERRS?."""
+    __slots__ = ()
+    bits = (1, 2, 4, 5, 6, 7)
+
+
+class LockinStatus(StatusRegister, namedtuple('LockinStatus', ['input_overload', 'filter_overload', 'output_overload',
+                                                             'reference_unlock', 'frequency_range_switch',
+                                                             'time_constant_changed', 'triggered'])):
+    """The lock-in status byte, read with LIAS?."""
+    __slots__ = ()
+    bits = (0, 1, 2, 3, 4, 5, 6)
+
+    @property
+    def overload(self):
+        return self.input_overload or self.filter_overload or self.output_overload
+
+
+Status = namedtuple('Status', ['status_byte', 'standard_event_status', 'error_status', 'lockin_status'])
+
+
 class SR830(object):
 
     # The SR830 will accept either newline (\n) or carriage return (\r) as the termination for input.
@@ -19,8 +82,27 @@ class SR830(object):
     # TODO: figure out the acceptable formats for floats
     float_format = ':.6f'
 
-    def __init__(self, serial_device, baud_rate=19200, timeout=1):
-        self.serial = serial.Serial(serial_device, baudrate=baud_rate, timeout=timeout, rtscts=True)
+    def __init__(self, serial_device, baud_rate=19200, timeout=1, cache_settings=False):
+        """
+        :param serial_device: the serial port name, or an object that behaves like serial.Serial, such as an
+          equipment.srs.emulator.SR830Emulator; in that case the baud rate and timeout are ignored.
+        :param baud_rate: the baud rate set on the lock-in.
+        :param timeout: the serial timeout in seconds.
+        :param cache_settings: if True, remember the settings in setting_queries after they are read or written, so
+          that later reads do not query the hardware. Use this only when nothing else changes the settings; see
+          invalidate_cache() and validate_cache().
+        """
+        if hasattr(serial_device, 'write'):
+            self.serial = serial_device
+        else:
+            self.serial = serial.Serial(serial_device, baudrate=baud_rate, timeout=timeout, rtscts=True)
+        self.reader = LineReader(self.serial, self.termination)
+        self.cache_settings = cache_settings
+        self._cache = {}
+        self._last_change = time.time()
+        self._stream_thread = None
+        self._stream_stop = None
+        self._stale_responses = 0  # Responses to abandoned queries that have not arrived yet; see _discard_stale().
 
     def send(self, message):
         self.serial.write(message + self.termination)
@@ -30,17 +112,30 @@ class SR830(object):
         return self.read_until_terminator()
 
     def read_until_terminator(self):
-        characters = []
-        while True:
-            character = self.serial.read()
-            if not character:  # self.serial has timed out.
-                print("Serial port timed out while reading.")
-                break
-            elif character == self.termination:
-                break
-            else:
-                characters.append(character)
-        return ''.join(characters).rstrip()  # Some commands seem to return both a space and carriage return.
+        self._discard_stale()
+        return self.reader.readline().rstrip()  # Some commands seem to return both a space and carriage return.
+
+    def _discard_stale(self, block=True):
+        """
+        Read and discard the responses to queries that were abandoned after a timeout. The lock-in answers queries in
+        order, so these always precede the response to any later query.
+
+        :param block: if True, wait up to completion_timeout for them to arrive and raise LockinError if they do not;
+          if False, discard only responses that have already arrived.
+        :return: True if no stale responses remain.
+        """
+        def discarded():
+            while self._stale_responses:
+                if self.reader.readline(block=False) is None:
+                    return False
+                self._stale_responses -= 1
+            return True
+
+        if not block or discarded():
+            return discarded()
+        wait_for(discarded, self.completion_timeout, LockinError,
+                 "No response to an abandoned query after {} seconds.".format(self.completion_timeout))
+        return True
 
     def send_and_receive(self, message):
         self.send(message)
@@ -52,38 +147,200 @@ class SR830(object):
         return {'rms_voltage': rms_voltage,
                 'signal_phase': signal_phase}
 
+    # The SR830 input buffer holds 256 characters, so longer batches of queries are split across several lines.
+    maximum_message_length = 255
+
+    def send_and_receive_many(self, messages):
+        """
+        Send several messages joined by semicolons, using as few lines as possible, and return the responses. The
+        messages are executed in order, and may include commands, which produce no response.
+
+        :param messages: a sequence of query or command strings.
+        :return: a list containing the response string for each query.
+        """
+        lines = []
+        n_queries = []
+        for message in messages:
+            if lines and len(lines[-1]) + 1 + len(message) <= self.maximum_message_length:
+                lines[-1] += ';' + message
+                n_queries[-1] += '?' in message
+            else:
+                lines.append(message)
+                n_queries.append(int('?' in message))
+        responses = []
+        for line, n in zip(lines, n_queries):
+            self.send(line)
+            expected = len(responses) + n
+            while len(responses) < expected:
+                # Each response normally arrives on its own line, but accept responses separated by semicolons too.
+                responses.extend(response.strip() for response in self.receive().split(';'))
+        return responses
+
+    # Each entry maps a setting name to the query that reads it and the function that converts the response. The names
+    # match the corresponding properties.
+    setting_queries = OrderedDict([('reference_phase', ('PHAS?', float)),
+                                   ('reference_source', ('FMOD?', int)),
+                                   ('reference_frequency', ('FREQ?', float)),
+                                   ('reference_trigger', ('RSLP?', int)),
+                                   ('detection_harmonic', ('HARM?', int)),
+                                   ('sine_output_voltage', ('SLVL?', float)),
+                                   ('input_configuration', ('ISRC?', int)),
+                                   ('input_shield_grounding', ('IGND?', int)),
+                                   ('input_coupling', ('ICPL?', int)),
+                                   ('input_notch_filter', ('ILIN?', int)),
+                                   ('sensitivity', ('SENS?', int)),
+                                   ('reserve_mode', ('RMOD?', int)),
+                                   ('time_constant', ('OFLT?', int)),
+                                   ('output_filter_slope', ('OFSL?', int)),
+                                   ('sync_filter', ('SYNC?', lambda response: bool(int(response)))),
+                                   ('sample_rate', ('SRAT?', int)),
+                                   ('identification', ('*IDN?', lambda response: tuple(response.split(',')))),
+                                   ('local', ('LOCL?', int))])
+
+    def read_settings(self, *names):
+        """
+        Read several settings from the hardware in a single round trip. This refreshes the cache, if enabled.
+
+        :param names: names of settings in setting_queries; if none are given, read all of them.
+        :return: a dict mapping each name to its value.
+        """
+        names = names or list(self.setting_queries)
+        responses = self.send_and_receive_many([self.setting_queries[name][0] for name in names])
+        settings = dict((name, self.setting_queries[name][1](response)) for name, response in zip(names, responses))
+        self._store_settings(settings)
+        return settings
+
+    def _store_settings(self, settings):
+        if not self.cache_settings:
+            return
+        self._cache.update(settings)
+        # With an external reference (reference_source 0) the frequency is measured, so it can change at any time.
+        if self._cache.get('reference_source') != 1:
+            self._cache.pop('reference_frequency', None)
+
+    def _get_setting(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            query, convert = self.setting_queries[name]
+            value = convert(self.send_and_receive(query))
+            self._store_settings({name: value})
+            return value
+
+    # These settings are not cached when they are set, because the lock-in rounds the value to its own resolution or
+    # rejects it depending on other settings; the next read refreshes them.
+    settings_read_after_set = frozenset(['reference_frequency', 'sine_output_voltage', 'detection_harmonic'])
+
+    # The lock-in ignores integer settings outside these inclusive limits, so such values are not cached.
+    setting_limits = {'reference_source': (0, 1),
+                      'reference_trigger': (0, 2),
+                      'input_configuration': (0, 3),
+                      'input_shield_grounding': (0, 1),
+                      'input_coupling': (0, 1),
+                      'input_notch_filter': (0, 3),
+                      'sensitivity': (0, 26),
+                      'reserve_mode': (0, 2),
+                      'time_constant': (0, 19),
+                      'output_filter_slope': (0, 3),
+                      'sync_filter': (0, 1),
+                      'sample_rate': (0, 14),
+                      'local': (0, 2)}
+
+    def _set_setting(self, name, message, value):
+        self.send(message)
+        self._record_setting(name, value)
+
+    # Update the cache and the settling deadline after a setting has been sent.
+    def _record_setting(self, name, value):
+        if name in self.settling_settings:
+            self._last_change = time.time()
+        minimum, maximum = self.setting_limits.get(name, (value, value))
+        if name in self.settings_read_after_set or not minimum <= value <= maximum:
+            self.invalidate_cache(name)
+        else:
+            self._store_settings({name: self.setting_queries[name][1](value)})
+
+    def invalidate_cache(self, *names):
+        """
+        Forget the cached values of the given settings, or of all settings if no names are given.
+        """
+        if names:
+            for name in names:
+                self._cache.pop(name, None)
+        else:
+            self._cache.clear()
+
+    def validate_cache(self):
+        """
+        Clear the cache if a front panel key has been pressed since the last check, since the key may have changed a
+        setting. Reading the key_pressed status bit clears it.
+
+        :return: True if the cache was kept, False if it was cleared.
+        """
+        if self.key_pressed:
+            self.invalidate_cache()
+            return False
+        return True
+
     @property
     def state(self):
-        rms_voltage, signal_phase = self.snap(3, 4)  # ensure that these are taken simultaneously.
-        return {'rms_voltage': rms_voltage,
-                'signal_phase': signal_phase,
-                'reference_phase': self.reference_phase,
-                'reference_source': self.reference_source,
-                'reference_frequency': self.reference_frequency,
-                'reference_trigger': self.reference_trigger,
-                'detection_harmonic': self.detection_harmonic,
-                'sine_output_voltage': self.sine_output_voltage,
-                'input_configuration': self.input_configuration,
-                'input_shield_grounding': self.input_shield_grounding,
-                'input_coupling': self.input_coupling,
-                'input_notch_filter': self.input_notch_filter,
-                'sensitivity': self.sensitivity,
-                'reserve_mode': self.reserve_mode,
-                'time_constant': self.time_constant,
-                'output_filter_slope': self.output_filter_slope,
-                'sync_filter': self.sync_filter,
-                'sample_rate': self.sample_rate,
-                'identification': self.identification,
-                'local': self.local,
-                }
-
-    def _wait_until_idle(self):
-        while True:
+        names = list(self.setting_queries)
+        # The snap ensures that these are taken simultaneously.
+        responses = self.send_and_receive_many(['SNAP? 3,4'] + [self.setting_queries[name][0] for name in names])
+        rms_voltage, signal_phase = [float(s) for s in responses[0].split(',')]
+        state = {'rms_voltage': rms_voltage,
+                 'signal_phase': signal_phase}
+        settings = dict((name, self.setting_queries[name][1](response)) for name, response in zip(names, responses[1:]))
+        self._store_settings(settings)
+        state.update(settings)
+        return state
+
+    # This is the default maximum time in seconds that wait_until_complete() waits for a command such as an auto
+    # function to finish.
+    completion_timeout = 60
+
+    def wait_until_complete(self, timeout=None, status_byte=False):
+        """
+        Wait until the lock-in reports that no command is in progress.
+
+        A status query is answered only once the preceding command has finished, so this sends one query and then
+        checks at increasing intervals whether the response has arrived, instead of flooding the port with queries.
+
+        :param timeout: the maximum time to wait in seconds; if None, use completion_timeout.
+        :param status_byte: if True, read the whole serial poll status byte with *STB? and decode the command in
+          progress bit; if False, read only that bit with *STB? 1.
+        :raises LockinError: if the timeout expires. The response to the pending query arrives when the command finishes
+          and is then discarded before the next response is read.
+        """
+        query = '*STB?' if status_byte else '*STB? 1'
+        pending = [False]
+
+        def complete():
+            if not self._discard_stale(block=False):
+                return False
+            if not pending[0]:
+                self.send(query)
+                pending[0] = True
+            response = self.reader.readline(block=False)
+            if response is None:
+                return False
+            pending[0] = False
             try:
-                if self.no_command_in_progress:
-                    break
-            except ValueError:
-                continue
+                status = int(response)
+            except ValueError:  # Responses are occasionally garbled while a command is in progress.
+                return False
+            if status_byte:
+                return bool(status & (1 << 1))
+            return bool(status)
+
+        if timeout is None:
+            timeout = self.completion_timeout
+        try:
+            wait_for(complete, timeout, LockinError, "Command still in progress after {} seconds.".format(timeout))
+        except LockinError:
+            if pending[0]:
+                self._stale_responses += 1
+            raise
 
     # The following properties and methods implement commands listed in the manaul. They appear in the same order as in
     # the manual.
@@ -97,11 +354,13 @@ class SR830(object):
          
         This property implements the PHAS (?) command.
         """
-        return float(self.send_and_receive('PHAS?'))
+        return self._get_setting('reference_phase')
 
     @reference_phase.setter
     def reference_phase(self, phase):
-        self.send(('PHAS {' + self.float_format + '}').format(phase))
+        # The lock-in wraps the phase into the range (-180, 180].
+        self._set_setting('reference_phase', ('PHAS {' + self.float_format + '}').format(phase),
+                          180 - (180 - phase) % 360)
 
     @property
     def reference_source(self):
@@ -110,11 +369,11 @@ class SR830(object):
         
         This property implements the FMOD (?) command.
         """
-        return int(self.send_and_receive('FMOD?'))
+        return self._get_setting('reference_source')
 
     @reference_source.setter
     def reference_source(self, source):
-        self.send('FMOD {:d}'.format(source))
+        self._set_setting('reference_source', 'FMOD {:d}'.format(source), source)
 
     @property
     def reference_frequency(self):
@@ -123,11 +382,11 @@ class SR830(object):
         
         This property implements the FREQ (?) command.
         """
-        return float(self.send_and_receive('FREQ?'))
+        return self._get_setting('reference_frequency')
 
     @reference_frequency.setter
     def reference_frequency(self, frequency):
-        self.send(('FREQ {' + self.float_format + '}').format(frequency))
+        self._set_setting('reference_frequency', ('FREQ {' + self.float_format + '}').format(frequency), frequency)
 
     @property
     def reference_trigger(self):
@@ -136,11 +395,11 @@ class SR830(object):
         
         This property implements the RSLP (?) command.
         """
-        return int(self.send_and_receive('RSLP?'))
+        return self._get_setting('reference_trigger')
 
     @reference_trigger.setter
     def reference_trigger(self, integer):
-        self.send('RSLP {:d}'.format(integer))
+        self._set_setting('reference_trigger', 'RSLP {:d}'.format(integer), integer)
 
     @property
     def detection_harmonic(self):
@@ -149,11 +408,11 @@ class SR830(object):
         
         This property implements the HARM (?) command.
         """
-        return int(self.send_and_receive('HARM?'))
+        return self._get_setting('detection_harmonic')
 
     @detection_harmonic.setter
     def detection_harmonic(self, integer):
-        self.send('HARM {:d}'.format(integer))
+        self._set_setting('detection_harmonic', 'HARM {:d}'.format(integer), integer)
 
     @property
     def sine_output_voltage(self):
@@ -162,11 +421,11 @@ class SR830(object):
         
         This property implements the SLVL (?) command.
         """
-        return float(self.send_and_receive('SLVL?'))
+        return self._get_setting('sine_output_voltage')
 
     @sine_output_voltage.setter
     def sine_output_voltage(self, voltage):
-        self.send(('SLVL {' + self.float_format + '}').format(voltage))
+        self._set_setting('sine_output_voltage', ('SLVL {' + self.float_format + '}').format(voltage), voltage)
 
     @property
     def input_configuration(self):
@@ -175,11 +434,11 @@ class SR830(object):
 
         This property implements the ISRC (?) command.
         """
-        return int(self.send_and_receive('ISRC?'))
+        return self._get_setting('input_configuration')
 
     @input_configuration.setter
     def input_configuration(self, integer):
-        self.send('ISRC {:d}'.format(integer))
+        self._set_setting('input_configuration', 'ISRC {:d}'.format(integer), integer)
 
     @property
     def input_shield_grounding(self):
@@ -188,11 +447,11 @@ class SR830(object):
 
         This property implements the IGND (?) command.
         """
-        return int(self.send_and_receive('IGND?'))
+        return self._get_setting('input_shield_grounding')
 
     @input_shield_grounding.setter
     def input_shield_grounding(self, integer):
-        self.send('IGND {:d}'.format(integer))
+        self._set_setting('input_shield_grounding', 'IGND {:d}'.format(integer), integer)
 
     @property
     def input_coupling(self):
@@ -201,11 +460,11 @@ class SR830(object):
 
         This property implements the ICPL (?) command.
         """
-        return int(self.send_and_receive('ICPL?'))
+        return self._get_setting('input_coupling')
 
     @input_coupling.setter
     def input_coupling(self, integer):
-        self.send('ICPL {:d}'.format(integer))
+        self._set_setting('input_coupling', 'ICPL {:d}'.format(integer), integer)
 
     @property
     def input_notch_filter(self):
@@ -214,11 +473,11 @@ class SR830(object):
 
         This property implements the ILIN (?) command.
         """
-        return int(self.send_and_receive('ILIN?'))
+        return self._get_setting('input_notch_filter')
 
     @input_notch_filter.setter
     def input_notch_filter(self, integer):
-        self.send('ILIN {:d}'.format(integer))
+        self._set_setting('input_notch_filter', 'ILIN {:d}'.format(integer), integer)
 
     # Gain and time constant commands
 
@@ -229,11 +488,11 @@ class SR830(object):
         
         This property implements the SENS (?) command.
         """
-        return int(self.send_and_receive('SENS?'))
+        return self._get_setting('sensitivity')
 
     @sensitivity.setter
     def sensitivity(self, integer):
-        self.send('SENS {:d}'.format(integer))
+        self._set_setting('sensitivity', 'SENS {:d}'.format(integer), integer)
 
     #sensitivity table. sensitivities[integer] -> volts
     sensitivities = ((np.array([1,2,5])[None,:])*((10.**np.arange(-9,1))[:,None])).flatten()[1:-2]
@@ -245,11 +504,11 @@ class SR830(object):
 
         This property implements the RMOD (?) command.
         """
-        return int(self.send_and_receive('RMOD?'))
+        return self._get_setting('reserve_mode')
 
     @reserve_mode.setter
     def reserve_mode(self, integer):
-        self.send('RMOD {:d}'.format(integer))
+        self._set_setting('reserve_mode', 'RMOD {:d}'.format(integer), integer)
 
     @property
     def time_constant(self):
@@ -258,11 +517,11 @@ class SR830(object):
 
         This property implements the OFLT (?) command.
         """
-        return int(self.send_and_receive('OFLT?'))
+        return self._get_setting('time_constant')
 
     @time_constant.setter
     def time_constant(self, integer):
-        self.send('OFLT {:d}'.format(integer))
+        self._set_setting('time_constant', 'OFLT {:d}'.format(integer), integer)
 
     time_constant_integer_to_seconds = {0: 10e-6,
                                         1: 30e-6,
@@ -292,11 +551,11 @@ class SR830(object):
 
         This property implements the OFSL (?) command.
         """
-        return int(self.send_and_receive('OFSL?'))
+        return self._get_setting('output_filter_slope')
 
     @output_filter_slope.setter
     def output_filter_slope(self, integer):
-        self.send('OFSL {:d}'.format(integer))
+        self._set_setting('output_filter_slope', 'OFSL {:d}'.format(integer), integer)
 
     @property
     def sync_filter(self):
@@ -306,15 +565,126 @@ class SR830(object):
         
         This property implements the SYNC (?) command.
         """
-        return bool(int(self.send_and_receive('SYNC?')))
+        return self._get_setting('sync_filter')
 
     @sync_filter.setter
     def sync_filter(self, boolean):
-        self.send('SYNC {:d}'.format(boolean))
+        self._set_setting('sync_filter', 'SYNC {:d}'.format(boolean), boolean)
+
+    # Slope codes 0 through 3 mean 6, 12, 18, and 24 dB per octave, which correspond to this many cascaded single-pole
+    # filters with the same time constant.
+    output_filter_slope_integer_to_poles = {0: 1,
+                                            1: 2,
+                                            2: 3,
+                                            3: 4}
+
+    # This maps (poles, accuracy) to the settling time in units of the time constant; see settling_time_constants().
+    _settling_time_constants = {}
+
+    @classmethod
+    def settling_time_constants(cls, poles, accuracy):
+        """
+        Return the number of time constants after which the step response of a cascade of identical single-pole filters
+        is within the given fractional accuracy of its final value. The results are cached.
+
+        The remaining error after x time constants is exp(-x) * sum(x**k / k! for k < poles), which is solved for x.
+
+        :param poles: the number of poles.
+        :param accuracy: the fractional error, such as 1e-3.
+        """
+        key = (poles, accuracy)
+        if key not in cls._settling_time_constants:
+            def error(x):
+                return math.exp(-x) * sum(x ** k / math.factorial(k) for k in range(poles))
+            lower, upper = 0., 1.
+            while error(upper) > accuracy:
+                lower, upper = upper, 2 * upper
+            while upper - lower > 1e-6 * upper:
+                middle = (lower + upper) / 2
+                if error(middle) > accuracy:
+                    lower = middle
+                else:
+                    upper = middle
+            cls._settling_time_constants[key] = upper
+        return cls._settling_time_constants[key]
+
+    # This is the default fractional accuracy used by settling_time() and wait_settled().
+    settling_accuracy = 1e-3
+
+    # Changing these settings disturbs the outputs, so the time of the most recent change is recorded for
+    # wait_settled().
+    settling_settings = frozenset(['reference_phase', 'reference_source', 'reference_frequency', 'detection_harmonic',
+                                   'sine_output_voltage', 'input_configuration', 'input_coupling', 'input_notch_filter',
+                                   'sensitivity', 'reserve_mode', 'time_constant', 'output_filter_slope',
+                                   'sync_filter'])
+
+    def settling_time(self, accuracy=None):
+        """
+        Return the time in seconds that the outputs take to settle within the given fractional accuracy of their final
+        values after a step, for the current time constant and output filter slope. The effect of the synchronous
+        filter is not included.
+
+        When the settings cache is enabled this makes no queries; otherwise it reads both settings in one round trip.
+
+        :param accuracy: the fractional error; if None, use settling_accuracy.
+        """
+        if accuracy is None:
+            accuracy = self.settling_accuracy
+        names = ('time_constant', 'output_filter_slope')
+        if all(name in self._cache for name in names):
+            settings = self._cache
+        else:
+            settings = self.read_settings(*names)
+        poles = self.output_filter_slope_integer_to_poles[settings['output_filter_slope']]
+        return (self.time_constant_integer_to_seconds[settings['time_constant']] *
+                self.settling_time_constants(poles, accuracy))
+
+    def settled_deadline(self, accuracy=None):
+        """
+        Return the time, as given by time.time(), at which the outputs will have settled after the most recent change
+        made through this object to a setting in settling_settings.
+
+        :param accuracy: the fractional error; if None, use settling_accuracy.
+        """
+        return self._last_change + self.settling_time(accuracy)
+
+    def wait_settled(self, accuracy=None):
+        """
+        Sleep until settled_deadline(), if it is in the future.
+
+        :param accuracy: the fractional error; if None, use settling_accuracy.
+        """
+        remaining = self.settled_deadline(accuracy) - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
 
     # Display and output commands
 
-    # DDEF
+    def get_display(self, channel):
+        """
+        Return the display and ratio codes for the given channel, as a tuple of two ints. See the manual.
+
+        The data storage buffer for each channel records the quantity shown on that channel's display, so this
+        determines what the buffer contains.
+
+        This method implements the DDEF? command.
+
+        :param channel: the display channel, 1 or 2.
+        """
+        display, ratio = self.send_and_receive('DDEF? {:d}'.format(channel)).split(',')
+        return int(display), int(ratio)
+
+    def set_display(self, channel, display, ratio=0):
+        """
+        Set the display and ratio codes for the given channel. See the manual.
+
+        This method implements the DDEF command.
+
+        :param channel: the display channel, 1 or 2.
+        :param display: the display code; for example, 0 is X on channel 1 and Y on channel 2.
+        :param ratio: the ratio code; 0 means no ratio.
+        """
+        self.send('DDEF {:d}, {:d}, {:d}'.format(channel, display, ratio))
 
     # FPOP
 
@@ -353,11 +723,9 @@ class SR830(object):
         :param wait_until_done: If True, this function will return only when the process has completed.
         """
         self.send('AGAN')
+        self.invalidate_cache('sensitivity')
         if wait_until_done:
-            orig_timeout = self.serial.timeout
-            self.serial.setTimeout(10)
-            self._wait_until_idle()
-            self.serial.setTimeout(orig_timeout)
+            self.wait_until_complete()
 
     def auto_reserve(self, wait_until_done=True):
         """
@@ -368,8 +736,9 @@ class SR830(object):
         :param wait_until_done: If True, this function will return only when the process has completed.
         """
         self.send('ARSV')
+        self.invalidate_cache('reserve_mode')
         if wait_until_done:
-            self._wait_until_idle()
+            self.wait_until_complete()
 
     def auto_phase(self, wait_until_done=True):
         """
@@ -380,23 +749,72 @@ class SR830(object):
         :param wait_until_done: If True, this function will return only when the process has completed.
         """
         self.send('APHS')
+        self.invalidate_cache('reference_phase')
         if wait_until_done:
-            self._wait_until_idle()
+            self.wait_until_complete()
+
+    # The auto offset functions change only the offsets, which are not cached.
 
     def auto_offset_X(self, wait_until_done=True):
         self.send('AOFF 1')
         if wait_until_done:
-            self._wait_until_idle()
+            self.wait_until_complete()
 
     def auto_offset_Y(self, wait_until_done=True):
         self.send('AOFF 2')
         if wait_until_done:
-            self._wait_until_idle()
+            self.wait_until_complete()
 
     def auto_offset_R(self, wait_until_done=True):
         self.send('AOFF 3')
         if wait_until_done:
-            self._wait_until_idle()
+            self.wait_until_complete()
+
+    # The autorange() method aims to keep R between these fractions of full scale. Since adjacent sensitivities differ
+    # by at most a factor of 2.5, the range must be at least this wide.
+    autorange_lower_fraction = 0.3
+    autorange_upper_fraction = 0.8
+
+    # This is the fractional accuracy to which autorange() waits for the outputs to settle after a sensitivity change.
+    autorange_accuracy = 1e-2
+
+    def autorange(self, maximum_steps=5):
+        """
+        Adjust the sensitivity so that R lies between autorange_lower_fraction and autorange_upper_fraction of full
+        scale. This is usually much faster than auto_gain() because it jumps directly to the sensitivity computed from
+        R and waits only for the output filter to settle; see wait_settled(). If the lock-in is overloaded, R is not a
+        useful estimate, so it first jumps to the largest full scale and then steps down using R.
+
+        Each step reads R and the overload status in one round trip. The overload status bits are latched, so the same
+        round trip first clears any overload latched earlier, such as while the output settled after a change.
+
+        :param maximum_steps: the maximum number of sensitivity changes to make.
+        :return: the final sensitivity code.
+        :raises LockinError: if the lock-in is overloaded at the largest full scale, or R is still out of range after
+          maximum_steps changes.
+        """
+        code = self.sensitivity
+        maximum_code = self.sensitivities.size - 1
+        for step in range(maximum_steps + 1):
+            cleared, snap, status = self.send_and_receive_many(['LIAS?', 'SNAP? 3,4', 'LIAS?'])
+            R = float(snap.split(',')[0])
+            if LockinStatus.from_byte(status).overload:
+                if code == maximum_code:
+                    raise LockinError("Overloaded at the largest full scale sensitivity.")
+                new_code = maximum_code
+            else:
+                if (self.autorange_lower_fraction * self.sensitivities[code] <= R <=
+                        self.autorange_upper_fraction * self.sensitivities[code]):
+                    return code
+                new_code = min(int(np.searchsorted(self.sensitivities, R / self.autorange_upper_fraction)),
+                               maximum_code)
+                if new_code == code:  # R is above range at the largest full scale.
+                    return code
+            if step == maximum_steps:
+                break
+            self.sensitivity = code = new_code
+            self.wait_settled(self.autorange_accuracy)
+        raise LockinError("Sensitivity still out of range after {:d} steps.".format(maximum_steps))
 
     # Data storage commands
 
@@ -407,23 +825,131 @@ class SR830(object):
 
         This property implements the SRAT command.
         """
-        return int(self.send_and_receive('SRAT?'))
+        return self._get_setting('sample_rate')
 
     @sample_rate.setter
     def sample_rate(self, integer):
-        self.send('SRAT {:d}'.format(integer))
+        self._set_setting('sample_rate', 'SRAT {:d}'.format(integer), integer)
+
+    # The sample rate code 14 means that a point is stored on each trigger.
+    sample_rate_integer_to_hertz = {0: 62.5e-3,
+                                    1: 125e-3,
+                                    2: 250e-3,
+                                    3: 500e-3,
+                                    4: 1.,
+                                    5: 2.,
+                                    6: 4.,
+                                    7: 8.,
+                                    8: 16.,
+                                    9: 32.,
+                                    10: 64.,
+                                    11: 128.,
+                                    12: 256.,
+                                    13: 512.}
+
+    sample_rate_trigger = 14
+
+    # Each data storage buffer holds this many points.
+    maximum_stored_points = 16383
+
+    # This is the maximum time in seconds to wait for points to be stored, beyond the expected acquisition time.
+    storage_timeout = 10
+
+    @property
+    def buffer_loop(self):
+        """
+        This is the end of buffer mode, represented by a bool. True means that storage continues at the start of the
+        buffer when it fills (loop mode); False means that storage stops (one shot mode).
+
+        This property implements the SEND (?) command.
+        """
+        return bool(int(self.send_and_receive('SEND?')))
+
+    @buffer_loop.setter
+    def buffer_loop(self, boolean):
+        self.send('SEND {:d}'.format(boolean))
+
+    # The TRIG command is implemented below in trigger().
+
+    @property
+    def trigger_starts_storage(self):
+        """
+        This is the trigger start mode, represented by a bool. True means that a trigger starts data storage.
+
+        This property implements the TSTR (?) command.
+        """
+        return bool(int(self.send_and_receive('TSTR?')))
 
-    # SEND
+    @trigger_starts_storage.setter
+    def trigger_starts_storage(self, boolean):
+        self.send('TSTR {:d}'.format(boolean))
 
-    # TRIG
+    def start_storage(self):
+        """
+        Start or resume data storage.
+
+        This method implements the STRT command.
+        """
+        self.send('STRT')
+
+    def pause_storage(self):
+        """
+        Pause data storage.
+
+        This method implements the PAUS command.
+        """
+        self.send('PAUS')
+
+    def reset_storage(self):
+        """
+        Reset the data storage buffers, discarding all stored points.
+
+        This method implements the REST command.
+        """
+        self.send('REST')
+
+    def arm_storage(self, sample_rate, loop=False):
+        """
+        Prepare the data storage buffers for a new acquisition without starting it.
+
+        :param sample_rate: the sample rate code. See sample_rate_integer_to_hertz.
+        :param loop: if True, storage continues at the start of the buffer when it fills.
+        """
+        self.pause_storage()
+        self.reset_storage()
+        self.sample_rate = sample_rate
+        self.buffer_loop = loop
 
-    # TSTR
+    def _wait_for_stored_points(self, n_points, sample_rate, poll_interval):
+        """
+        Sleep for the expected acquisition time, then poll until n_points are stored. Raise LockinError if they are not
+        stored within storage_timeout seconds after that; in trigger mode, this includes waiting for the triggers.
+        """
+        if sample_rate in self.sample_rate_integer_to_hertz:
+            time.sleep(n_points / self.sample_rate_integer_to_hertz[sample_rate])
+        wait_for(lambda: self.n_stored_points >= n_points, self.storage_timeout, LockinError,
+                 "Fewer than {:d} points stored after {} seconds.".format(n_points, self.storage_timeout),
+                 initial_interval=poll_interval, maximum_interval=poll_interval)
 
-    # STRT
+    def acquire_storage(self, n_points, sample_rate, poll_interval=0.1):
+        """
+        Record n_points into both data storage buffers at the given sample rate, then download them.
 
-    # PAUS
+        The buffers record whatever the two channel displays show; by default these are X and Y. See set_display().
 
-    # REST
+        :param n_points: the number of points to record; at most maximum_stored_points.
+        :param sample_rate: the sample rate code. See sample_rate_integer_to_hertz.
+        :param poll_interval: the time in seconds between checks of the number of stored points once the expected
+          acquisition time has passed.
+        :return: two float arrays containing the channel 1 and channel 2 data.
+        """
+        if not 0 < n_points <= self.maximum_stored_points:
+            raise LockinError("Number of points must be between 1 and {:d}.".format(self.maximum_stored_points))
+        self.arm_storage(sample_rate)
+        self.start_storage()
+        self._wait_for_stored_points(n_points, sample_rate, poll_interval)
+        self.pause_storage()
+        return self.read_buffers(0, n_points)
 
     # Data transfer commands
 
@@ -450,6 +976,76 @@ class SR830(object):
         response = self.send_and_receive(message)
         return [float(s) for s in response.split(',')]
 
+    sweep_dtype = np.dtype([('frequency', np.float64),
+                            ('X', np.float64),
+                            ('Y', np.float64),
+                            ('R', np.float64),
+                            ('theta', np.float64)])
+
+    def frequency_sweep(self, frequencies, accuracy=None, n_points=None, sample_rate=13, poll_interval=0.01):
+        """
+        Step the reference frequency through the given values and measure the outputs at each one, waiting at each
+        frequency only as long as the output filter needs to settle; see wait_settled().
+
+        The measurement of each point and the command that sets the next frequency are sent on the same line, so each
+        point costs a single round trip, and the lock-in changes the frequency as soon as it has taken the measurement.
+        When each point is measured with SNAP?, the settling time of the next frequency is counted from the arrival of
+        the first byte of the response, so the output filter settles while the rest of the response is transmitted and
+        parsed.
+
+        :param frequencies: an array of reference frequencies in Hz.
+        :param accuracy: the fractional settling accuracy; if None, use settling_accuracy.
+        :param n_points: if None, measure each point with one SNAP? query. Otherwise, record this many points in the
+          data storage buffers at each frequency and return their means; the channel displays should then be X and Y.
+        :param sample_rate: the sample rate code used with n_points. See sample_rate_integer_to_hertz.
+        :param poll_interval: the time in seconds between checks of the number of stored points once the expected
+          acquisition time has passed.
+        :return: a structured array with dtype sweep_dtype. The frequency field contains the frequency reported by
+          the lock-in.
+        """
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        data = np.empty(frequencies.size, dtype=self.sweep_dtype)
+        if not frequencies.size:
+            return data
+        if n_points is not None:
+            if not 0 < n_points <= self.maximum_stored_points:
+                raise LockinError("Number of points must be between 1 and {:d}.".format(self.maximum_stored_points))
+            self.arm_storage(sample_rate)
+        frequency_format = 'FREQ {' + self.float_format + '}'
+        settling_time = self.settling_time(accuracy)  # The filter settings do not change during the sweep.
+        self.reference_frequency = frequencies[0]
+        for n in range(frequencies.size):
+            remaining = self._last_change + settling_time - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+            next_frequency = [frequency_format.format(frequencies[n + 1])] if n + 1 < frequencies.size else []
+            if n_points is None:
+                self.send(';'.join(['SNAP? 1,2,3,4,9'] + next_frequency))
+                self._discard_stale()
+                self.reader.wait()
+                changed = time.time()  # The lock-in executes the FREQ command right after the SNAP? query.
+                response = self.receive()
+                X, Y, R, theta, frequency = [float(s) for s in response.split(',')]
+            else:
+                self.send('REST;STRT')
+                self._wait_for_stored_points(n_points, sample_rate, poll_interval)
+                self.send(';'.join(['PAUS', 'FREQ?'] +
+                                   ['TRCB? {:d}, 0, {:d}'.format(channel, n_points) for channel in (1, 2)] +
+                                   next_frequency))
+                frequency = float(self.receive())
+                buffers = np.frombuffer(self._read_bytes(2 * n_points * self.buffer_binary_dtype.itemsize),
+                                        dtype=self.buffer_binary_dtype)
+                X = buffers[:n_points].mean(dtype=np.float64)
+                Y = buffers[n_points:].mean(dtype=np.float64)
+                R = np.hypot(X, Y)
+                theta = np.degrees(np.arctan2(Y, X))
+                changed = time.time()
+            data[n] = frequency, X, Y, R, theta
+            if next_frequency:
+                self._record_setting('reference_frequency', frequencies[n + 1])
+                self._last_change = changed
+        return data
+
     # OAUX
 
     @property
@@ -474,15 +1070,214 @@ class SR830(object):
     def n_stored_points(self):
         return int(self.send_and_receive('SPTS?'))
 
-    # TRCA
+    # The TRCB command returns little-endian IEEE floats.
+    buffer_binary_dtype = np.dtype('<f4')
+
+    # The TRCL command returns a two-byte mantissa followed by a two-byte exponent; see _decode_long().
+    buffer_long_dtype = np.dtype([('mantissa', '<i2'), ('exponent', '<i2')])
+
+    def _buffer_range(self, start, n_points):
+        if n_points is None:
+            n_points = self.n_stored_points - start
+        return start, max(n_points, 0)
+
+    def _read_bytes(self, n_bytes):
+        self._discard_stale()
+        data = self.reader.read(n_bytes)
+        if len(data) < n_bytes:  # self.serial has timed out.
+            raise LockinError("Serial port timed out with {:d} of {:d} bytes read.".format(len(data), n_bytes))
+        return data
+
+    @classmethod
+    def _decode_long(cls, data):
+        points = np.frombuffer(data, dtype=cls.buffer_long_dtype)
+        return np.ldexp(points['mantissa'].astype(np.float64), points['exponent'].astype(np.int32) - 124)
+
+    def read_buffer_ascii(self, channel, start=0, n_points=None):
+        """
+        Read points from a data storage buffer in ASCII format. This is much slower than read_buffer().
+
+        This method implements the TRCA? command.
+
+        :param channel: the buffer to read, 1 or 2.
+        :param start: the index of the first point to read; 0 is the oldest point.
+        :param n_points: the number of points to read; if None, read all points from start to the end.
+        :return: a float array.
+        """
+        start, n_points = self._buffer_range(start, n_points)
+        if not n_points:
+            return np.array([])
+        response = self.send_and_receive('TRCA? {:d}, {:d}, {:d}'.format(channel, start, n_points))
+        return np.array([float(s) for s in response.split(',') if s])
+
+    def read_buffer(self, channel, start=0, n_points=None):
+        """
+        Read points from a data storage buffer in binary IEEE float format.
+
+        This method implements the TRCB? command.
+
+        :param channel: the buffer to read, 1 or 2.
+        :param start: the index of the first point to read; 0 is the oldest point.
+        :param n_points: the number of points to read; if None, read all points from start to the end.
+        :return: a float array.
+        """
+        start, n_points = self._buffer_range(start, n_points)
+        if not n_points:
+            return np.array([])
+        self.send('TRCB? {:d}, {:d}, {:d}'.format(channel, start, n_points))
+        data = self._read_bytes(n_points * self.buffer_binary_dtype.itemsize)
+        return np.frombuffer(data, dtype=self.buffer_binary_dtype).astype(np.float64)
+
+    def read_buffer_long(self, channel, start=0, n_points=None):
+        """
+        Read points from a data storage buffer in the non-normalized binary format, which the lock-in produces faster
+        than IEEE floats.
+
+        This method implements the TRCL? command.
+
+        :param channel: the buffer to read, 1 or 2.
+        :param start: the index of the first point to read; 0 is the oldest point.
+        :param n_points: the number of points to read; if None, read all points from start to the end.
+        :return: a float array.
+        """
+        start, n_points = self._buffer_range(start, n_points)
+        if not n_points:
+            return np.array([])
+        self.send('TRCL? {:d}, {:d}, {:d}'.format(channel, start, n_points))
+        return self._decode_long(self._read_bytes(n_points * self.buffer_long_dtype.itemsize))
+
+    def read_buffers(self, start=0, n_points=None, long_format=False):
+        """
+        Read the same range of points from both data storage buffers in a single binary transfer.
+
+        This method implements the TRCB? or TRCL? command for both channels.
+
+        :param start: the index of the first point to read; 0 is the oldest point.
+        :param n_points: the number of points to read; if None, read all points from start to the end.
+        :param long_format: if True, use the TRCL? non-normalized format instead of TRCB?.
+        :return: two float arrays containing the channel 1 and channel 2 data.
+        """
+        start, n_points = self._buffer_range(start, n_points)
+        if not n_points:
+            return np.array([]), np.array([])
+        command = 'TRCL?' if long_format else 'TRCB?'
+        self.send(';'.join(['{} {:d}, {:d}, {:d}'.format(command, channel, start, n_points) for channel in (1, 2)]))
+        if long_format:
+            data = self._decode_long(self._read_bytes(2 * n_points * self.buffer_long_dtype.itemsize))
+        else:
+            data = np.frombuffer(self._read_bytes(2 * n_points * self.buffer_binary_dtype.itemsize),
+                                 dtype=self.buffer_binary_dtype).astype(np.float64)
+        return data[:n_points], data[n_points:]
+
+    @property
+    def fast_mode(self):
+        """
+        This is the fast data transfer mode, represented by an int: 0 is off, 1 is on, and 2 is on with the transfer
+        starting only after the STRD command. See the manual.
+
+        This property implements the FAST (?) command.
+        """
+        return int(self.send_and_receive('FAST?'))
+
+    @fast_mode.setter
+    def fast_mode(self, integer):
+        self.send('FAST {:d}'.format(integer))
+
+    def start_scan(self):
+        """
+        Start data storage after a delay of 0.5 seconds. Use this with fast_mode 2.
+
+        This method implements the STRD command.
+        """
+        self.send('STRD')
+
+    # In fast mode the lock-in sends X and Y for each stored point as little-endian signed 16-bit integers, scaled so
+    # that this number of counts equals the full scale sensitivity.
+    fast_dtype = np.dtype('<i2')
+    fast_full_scale_counts = 30000
+
+    @property
+    def streaming(self):
+        return self._stream_thread is not None and self._stream_thread.is_alive()
 
-    # TRCB
+    def start_streaming(self, sample_rate=13, capacity=2 ** 20, chunk_points=64):
+        """
+        Start streaming X and Y in fast mode into a ring buffer that is filled by a background thread. Use
+        read_stream() to collect the data and stop_streaming() to return to normal operation; no other commands may be
+        sent while streaming.
+
+        The lock-in sends the quantities shown on the two channel displays, so these should be X and Y. The data is
+        scaled using the sensitivity at the time streaming starts.
 
-    # TRCL
+        :param sample_rate: the sample rate code. See sample_rate_integer_to_hertz.
+        :param capacity: the number of points the ring buffer holds.
+        :param chunk_points: the number of points that the reader thread waits for before decoding them.
+        """
+        if self.streaming:
+            raise LockinError("Already streaming.")
+        volts_per_count = self.sensitivities[self.sensitivity] / self.fast_full_scale_counts
+        self.stream_buffer = RingBuffer(capacity, 2)
+        self._stream_error = None
+        self._stream_stop = threading.Event()
+        self.arm_storage(sample_rate, loop=True)
+        self.fast_mode = 2
+        self.start_scan()
+        self._stream_thread = threading.Thread(target=self._stream,
+                                               args=(self.sample_rate_integer_to_hertz.get(sample_rate),
+                                                     volts_per_count, chunk_points))
+        self._stream_thread.daemon = True
+        self._stream_thread.start()
+
+    def _stream(self, sample_rate, volts_per_count, chunk_points):
+        point_size = 2 * self.fast_dtype.itemsize
+        leftover = b''
+        first_time = None
+        n_points = 0
+        try:
+            while not self._stream_stop.is_set():
+                data = leftover + self.serial.read(chunk_points * point_size - len(leftover))
+                now = time.time()
+                n = len(data) // point_size
+                leftover = data[n * point_size:]
+                if not n:
+                    continue
+                values = volts_per_count * np.frombuffer(data[:n * point_size], dtype=self.fast_dtype).reshape(n, 2)
+                if sample_rate is None:  # Points are stored on trigger, so use the arrival time.
+                    timestamps = np.repeat(now, n)
+                else:
+                    if first_time is None:
+                        first_time = now - (n - 1) / sample_rate
+                    timestamps = first_time + np.arange(n_points, n_points + n) / sample_rate
+                self.stream_buffer.write(timestamps, values)
+                n_points += n
+        except Exception as e:
+            self._stream_error = e
+
+    def read_stream(self):
+        """
+        Return all points streamed since the previous call, without blocking.
 
-    # FAST
+        :return: three float arrays containing the timestamps, X, and Y.
+        """
+        if self._stream_error is not None:
+            raise LockinError("Streaming failed: {}".format(self._stream_error))
+        timestamps, values = self.stream_buffer.read()
+        return timestamps, values[:, 0], values[:, 1]
 
-    # STRD
+    def stop_streaming(self):
+        """
+        Stop streaming, turn fast mode off, and discard any bytes still in transit. Do nothing if streaming was not
+        started.
+        """
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self.send('PAUS;FAST 0')
+        self._stream_thread.join()
+        self._stream_thread = None
+        time.sleep(self.serial.timeout or 0)
+        self.serial.reset_input_buffer()
+        self.reader.clear()
 
     # Interface commands
 
@@ -493,6 +1288,7 @@ class SR830(object):
         This method implements the *RST command.
         """
         self.send('*RST')
+        self.invalidate_cache()
 
     @property
     def identification(self):
@@ -501,18 +1297,18 @@ class SR830(object):
 
         :return: a four-element tuple containing identification information.
         """
-        return tuple(self.send_and_receive('*IDN?').split(','))
+        return self._get_setting('identification')
 
     @property
     def local(self):
         """
         This property implements the LOCL command.
         """
-        return int(self.send_and_receive('LOCL?'))
+        return self._get_setting('local')
 
     @local.setter
     def local(self, integer):
-        self.send('LOCL {:d}'.format(integer))
+        self._set_setting('local', 'LOCL {:d}'.format(integer), integer)
 
     # OVRM
 
@@ -530,6 +1326,55 @@ class SR830(object):
         """
         self.send('*CLS')
 
+    # Each whole-register query below returns a record of all the bits, and reading the *ESR?, ERRS?, or LIAS?
+    # registers this way clears all of their bits. The single-bit properties further down clear only the bit they read.
+
+    @property
+    def status_byte(self):
+        """
+        This property implements the *STB? command.
+
+        :return: a StatusByte.
+        """
+        return StatusByte.from_byte(self.send_and_receive('*STB?'))
+
+    @property
+    def standard_event_status(self):
+        """
+        This property implements the *ESR? command.
+
+        :return: a StandardEventStatus.
+        """
+        return StandardEventStatus.from_byte(self.send_and_receive('*ESR?'))
+
+    @property
+    def error_status(self):
+        """
+        This property implements the ERRS? command.
+
+        :return: an ErrorStatus.
+        """
+        return ErrorStatus.from_byte(self.send_and_receive('ERRS?'))
+
+    @property
+    def lockin_status(self):
+        """
+        This property implements the LIAS? command.
+
+        :return: a LockinStatus.
+        """
+        return LockinStatus.from_byte(self.send_and_receive('LIAS?'))
+
+    def read_status(self):
+        """
+        Read all four status registers in a single round trip.
+
+        :return: a Status containing a StatusByte, a StandardEventStatus, an ErrorStatus, and a LockinStatus.
+        """
+        responses = self.send_and_receive_many(['*STB?', '*ESR?', 'ERRS?', 'LIAS?'])
+        return Status(*[record.from_byte(response) for record, response in
+                        zip((StatusByte, StandardEventStatus, ErrorStatus, LockinStatus), responses)])
+
     # *ESE
 
     @property
@@ -560,31 +1405,31 @@ class SR830(object):
 
     @property
     def no_scan_in_progress(self):
-        return bool(int(self.send_and_receive('*STB? 0')))
+        return self.status_byte.no_scan_in_progress
 
     @property
     def no_command_in_progress(self):
-        return bool(int(self.send_and_receive('*STB? 1')))
+        return self.status_byte.no_command_in_progress
 
     @property
     def any_error_status(self):
-        return bool(int(self.send_and_receive('*STB? 2')))
+        return self.status_byte.any_error_status
 
     @property
     def any_lockin_status(self):
-        return bool(int(self.send_and_receive('*STB? 3')))
+        return self.status_byte.any_lockin_status
 
     @property
     def interface_output_buffer_nonempty(self):
-        return bool(int(self.send_and_receive('*STB? 4')))
+        return self.status_byte.interface_output_buffer_nonempty
 
     @property
     def any_standard_status(self):
-        return bool(int(self.send_and_receive('*STB? 5')))
+        return self.status_byte.any_standard_status
 
     @property
     def service_request(self):
-        return bool(int(self.send_and_receive('*STB? 6')))
+        return self.status_byte.service_request
 
     # *PSC
 
@@ -632,10 +1477,6 @@ class SR830(object):
     def reference_unlock(self):
         return bool(int(self.send_and_receive('LIAS? 3')))
 
-    @property
-    def reference_unlock(self):
-        return bool(int(self.send_and_receive('LIAS? 3')))
-
     @property
     def frequency_range_switch(self):
         return bool(int(self.send_and_receive('LIAS? 4')))
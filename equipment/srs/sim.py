@@ -1,8 +1,10 @@
 """
 This module contains classes to interface with SRS SIM hardware.
 
-The classes do not maintain any internal state that corresponds to hardware settings: all state queries are directed
-to the hardware.
+The module classes do not maintain any internal state that corresponds to hardware settings: all state queries are
+directed to the hardware. The exceptions avoid redundant messages: SIM900 records the connected port, the module in
+each port, and the ports that were found to be empty, and SIM921Scanner caches the bridge settings and multiplexer
+channel that it last sent, assuming that nothing else changes them.
 
 As described below in more detail, the query commands return strings, booleans, or floats.
 
@@ -25,11 +27,25 @@ converted to uppercase.)
 """
 from __future__ import division
 import os
+import math
+import json
+import hashlib
 import time
+import threading
+import warnings
+import itertools
 import serial
 import numpy as np
 from collections import OrderedDict
 
+from equipment.communication import Pacer, wait_for
+from equipment.stream import ColumnStore, RingBuffer
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
 
 class SIMError(Exception):
     pass
@@ -43,6 +59,44 @@ class SIMTimeout(SIMError):
     pass
 
 
+class SIMRequest(object):
+    """
+    This class represents a call queued for the SIM900 scheduler thread. The thread that submitted it waits for the
+    outcome using result().
+    """
+
+    def __init__(self, port, function, args=(), priority=0):
+        self.port = port
+        self.function = function
+        self.args = args
+        self.priority = priority
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def run(self):
+        try:
+            self._result = self.function(*self.args)
+        except Exception as e:
+            self._exception = e
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the call to complete and return its result, or raise the exception that it raised.
+
+        :param timeout: the maximum time to wait, in seconds; if None, wait forever.
+        """
+        if not self._done.wait(timeout):
+            raise SIMTimeout("Request to port {} not completed after {} seconds.".format(self.port, timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
 class SIM(object):
 
     termination = '\n'
@@ -55,43 +109,97 @@ class SIM(object):
     boolean_to_token = {True: 'ON',
                         False: 'OFF'}
 
-    # This is experimental. The methods that send commands wait for this time in seconds:
+    # This is the minimum time in seconds between the end of the previous message or response on the serial line and
+    # the start of a message to this device; see Pacer. Subclasses can override it, and it can be changed for one
+    # instance by setting this attribute. Modules in a mainframe share its serial line, so they share its pacer, and
+    # the mainframe's interval is the minimum for every message.
     communication_delay = 1e-3
 
     # TODO: figure out the acceptable formats for floats
     float_format = ':.6f'
 
+    # When the mainframe scheduler is running, queued requests with lower values are served first.
+    priority = 0
+
+    # Unread input is discarded until none has arrived for this many seconds, or for one character time if that is
+    # longer. It must exceed the gap between consecutive responses from the device.
+    discard_quiet = 0.02
+
     def __init__(self, serial, parent_and_port=(None, None)):
         self.serial = serial
         self.parent, self.port = parent_and_port
+        if self.parent is None:
+            self.pacer = Pacer(self.communication_delay)
+        else:
+            self.pacer = self.parent.pacer
+
+    def _write(self, message):
+        if self.parent is None:
+            self._serial_write(message + self.termination, self.communication_delay)
+        else:
+            self.parent.port_write(self.port, message, self.communication_delay)
+
+    def _serial_write(self, data, interval=None):
+        """
+        Write data to the serial port at least interval seconds after the line became quiet. See Pacer.
+        """
+        self.pacer.wait(interval)
+        self.serial.write(data)
+        self.pacer.sent(len(data), getattr(self.serial, 'baudrate', None))
+
+    def _readline(self):
+        if self.parent is None:
+            response = self.serial.readline().strip()
+            self.pacer.received(response)
+        else:
+            response = self.parent.port_readline(self.port)
+        return response
+
+    def _discard_input(self):
+        """
+        Discard any responses from this device that have not been read, including those still arriving: the input is
+        discarded repeatedly until the port has been quiet for discard_quiet seconds, so the time taken scales with the
+        number of responses in flight and the baud rate. Stop trying after the serial timeout. The caller must have
+        exclusive use of the serial port.
+        """
+        baud_rate = getattr(self.serial, 'baudrate', None)
+        quiet = max(self.discard_quiet, self.pacer.bits_per_byte / baud_rate if baud_rate else 0)
+        if self.serial.timeout is not None:
+            deadline = time.time() + self.serial.timeout
+        while self.serial.timeout is None or time.time() < deadline:
+            time.sleep(quiet)
+            if self.parent is None:
+                discarded = self.serial.in_waiting
+                self.serial.reset_input_buffer()
+            else:
+                discarded = self.parent.discard_port_input(self.port)
+            if not discarded:
+                return
+
+    def _call(self, function, *args):
+        """
+        Return function(*args), called with exclusive use of the serial port. The mainframe may run the call in its
+        scheduler thread.
+        """
+        if self.parent is None:
+            return function(*args)
+        else:
+            return self.parent.call(self.port, function, args, self.priority)
+
+    def _send_and_receive(self, message):
+        self._write(message)
+        return self._readline()
 
     def send(self, message):
-        if self.parent is not None:
-            self.parent.connect(self.port)
-        self.serial.write(message + self.termination)
-        if self.parent is not None:
-            self.parent.disconnect()
-        time.sleep(self.communication_delay)
+        self._call(self._write, message)
 
     # Consider raising SIMTimeout for blank messages;
     # needs to handle disconnection elegantly.
     def receive(self):
-        if self.parent is not None:
-            self.parent.connect(self.port)
-        response = self.serial.readline().strip()
-        if self.parent is not None:
-            self.parent.disconnect()
-        return response
+        return self._call(self._readline)
 
     def send_and_receive(self, message):
-        if self.parent is not None:
-            self.parent.connect(self.port)
-        self.serial.write(message + self.termination)
-        response = self.serial.readline().strip()
-        if self.parent is not None:
-            self.parent.disconnect()
-        time.sleep(self.communication_delay)
-        return response
+        return self._call(self._send_and_receive, message)
 
     # Handle boolean user input for commands that accept ('OFF', '0', 'ON', '1').
     def _boolean_input(self, thing):
@@ -140,7 +248,36 @@ class SIM900(SIM):
     # This is the ASCII <ESC> character.
     escape = chr(27)
 
-    def __init__(self, serial_port, baudrate=9600, timeout=2, autodetect=True):
+    # In 'connect' mode, module messages pass through a CONN connection to one port at a time. In 'addressed' mode,
+    # they are sent with SNDT and their responses are fetched from the per-port input queues with NINP? and GETN?, so
+    # queries to several modules can be outstanding at once.
+    transports = ('connect', 'addressed')
+
+    # This is the time in seconds that identify_ports() waits for modules to respond; empty ports never respond.
+    detection_timeout = 0.2
+
+    def __init__(self, serial_port, baudrate=9600, timeout=2, autodetect=True, transport='connect', reset=True,
+                 inventory_file=None):
+        """
+        Open the mainframe.
+
+        By default, reset the mainframe and all modules, then detect the modules by broadcasting an identification
+        query, which takes a few seconds. If reset is False, attach to the running modules without changing their
+        state or discarding their queued responses. In this case, if autodetect is True, the modules recorded in inventory_file are created without any
+        communication and then checked with one identification query each; the file is rewritten if any port has
+        changed. Other ports are detected when they are first requested using module().
+
+        :param inventory_file: the path of a JSON file that records the model and serial number in each port.
+        """
+        if transport not in self.transports:
+            raise SIMValueError("Valid transports are {}".format(', '.join(self.transports)))
+        self.transport = transport
+        self._port_input = {}
+        self.lock = threading.RLock()
+        self._requests = None
+        self._scheduler_thread = None
+        self._scheduler_stopping = False
+        self._sequence = itertools.count()
         self.serial = serial.Serial(port=serial_port, baudrate=baudrate, timeout=timeout)
         self.ports = OrderedDict([('1', None),
                                   ('2', None),
@@ -158,12 +295,21 @@ class SIM900(SIM):
 #                                  ('C', None),
 #                                  ('D', None)])
         self.parent = None
+        self.pacer = Pacer(self.communication_delay)
+        self.inventory_file = inventory_file
+        self.inventory = {}
+        self._empty_ports = set()  # Ports that did not answer an identification query.
         self.disconnect()
-        self.reset()
-        self.flush()
-        self.SIM_reset()
-        if autodetect:
-            self.autodetect()
+        if reset:
+            self.reset()
+            self.flush()
+            self.SIM_reset()
+            if autodetect:
+                self.autodetect()
+                if self.inventory_file is not None:
+                    self.save_inventory()
+        elif autodetect:
+            self.attach()
 
     def __str__(self):
         return "Mainframe"
@@ -194,8 +340,10 @@ class SIM900(SIM):
         """
         if port is None:
             self.send('FLSH')
+            self._port_input.clear()
         elif str(port) in self.ports:
             self.send('FLSH {}'.format(port))
+            self._port_input.pop(str(port), None)
         else:
             raise SIMValueError("Invalid port {}'.format(port)")
 
@@ -213,16 +361,290 @@ class SIM900(SIM):
         else:
             raise SIMValueError("Invalid port {}".format(port))
 
+    # The mainframe stays connected to a module port until a message for another port, or for the mainframe itself, is
+    # sent, so a sequence of messages to the same module costs no extra CONN and escape messages.
+
     def connect(self, port):
+        """
+        Connect the host to the given port. Do nothing if that port is already connected, and disconnect from any other
+        port first.
+
+        This method implements the CONN command.
+        """
+        port = str(port)
+        if self.connected == port:
+            return
         if self.connected is not None:
-            raise SIMError("Connected to port {}".format(self.connected))
-        self.send('CONN {}, "{}"'.format(port, self.escape))
+            self.disconnect()
+        SIM._write(self, 'CONN {}, "{}"'.format(port, self.escape))
         self.connected = port
 
     def disconnect(self):
-        self.send(self.escape)
+        """
+        Return the host connection to the mainframe by sending the escape string. This is safe to call when no port
+        is connected.
+        """
+        SIM._write(self, self.escape)
         self.connected = None
 
+    # Messages to the mainframe itself go through these methods, which disconnect from any module port first.
+
+    def _call(self, function, *args):
+        return self.call(None, function, args, self.priority)
+
+    def _write(self, message):
+        if self.connected is not None:
+            self.disconnect()
+        super(SIM900, self)._write(message)
+
+    def _readline(self):
+        if self.connected is not None:
+            self.disconnect()
+        return super(SIM900, self)._readline()
+
+    # Scheduling.
+
+    @property
+    def scheduler_running(self):
+        return self._scheduler_thread is not None
+
+    def start_scheduler(self):
+        """
+        Start a thread that owns the serial port. While it runs, calls from modules in any thread are queued as
+        SIMRequest objects and served by this thread, so several threads can share the mainframe safely. The thread
+        takes every request that is waiting, serves them in order of priority, and within each priority groups them
+        by port so that the connected port changes as rarely as possible. Each call blocks until it is served, so calls
+        from one thread keep their order.
+        """
+        if self.scheduler_running:
+            raise SIMError("Scheduler already running.")
+        self._requests = queue.PriorityQueue()
+        self._scheduler_thread = threading.Thread(target=self._schedule, name='SIM900 scheduler')
+        self._scheduler_thread.daemon = True
+        self._scheduler_thread.start()
+
+    def stop_scheduler(self):
+        """
+        Serve any requests that are already queued, then stop the scheduler thread. Calls made after this method is
+        entered run in the calling thread.
+        """
+        with self.lock:
+            if not self.scheduler_running or self._scheduler_stopping:
+                return
+            self._scheduler_stopping = True
+            thread = self._scheduler_thread
+            self._requests.put((float('inf'), next(self._sequence), None))
+        thread.join()
+        with self.lock:
+            self._scheduler_thread = None
+            self._scheduler_stopping = False
+
+    def _enqueue(self, request):
+        """
+        Queue the request for the scheduler thread and return True, or return False if the request must run in the
+        calling thread because the scheduler is not running, is stopping, or is the calling thread. The caller must
+        hold the lock, so that stop_scheduler() cannot put its sentinel between the check and the put.
+        """
+        if (not self.scheduler_running or self._scheduler_stopping
+                or threading.current_thread() is self._scheduler_thread):
+            return False
+        self._requests.put((request.priority, next(self._sequence), request))
+        return True
+
+    def submit(self, port, function, args=(), priority=0):
+        """
+        Queue function(*args) to be called with exclusive use of the serial port, and return a SIMRequest. If the
+        scheduler is not running, make the call immediately in this thread.
+
+        :param port: the port that the call talks to, or None for the mainframe itself; used to group requests.
+        :param priority: requests with lower values are served first.
+        """
+        request = SIMRequest(port, function, args, priority)
+        with self.lock:
+            if not self._enqueue(request):
+                request.run()
+        return request
+
+    def call(self, port, function, args=(), priority=0):
+        """
+        Return function(*args), called with exclusive use of the serial port. See submit().
+        """
+        request = SIMRequest(port, function, args, priority)
+        with self.lock:
+            if not self._enqueue(request):
+                return function(*args)
+        return request.result()
+
+    def _schedule(self):
+        stopping = False
+        while not stopping:
+            batch = [self._requests.get()]
+            while True:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+            batch.sort(key=lambda item: (item[0], item[2] is not None and item[2].port != self.connected,
+                                         item[2] is not None and str(item[2].port), item[1]))
+            # After the sentinel, nothing new is queued, so the rest of this batch is everything left to serve.
+            for priority, sequence, request in batch:
+                if request is None:
+                    stopping = True
+                else:
+                    with self.lock:
+                        request.run()
+
+    # Messages to modules go through these methods.
+
+    # All writes to the serial line, including CONN and escape messages, go through the mainframe pacer. The interval
+    # is the communication_delay of the module that the message is for.
+
+    def port_write(self, port, message, interval=None):
+        if self.transport == 'addressed':
+            self._send_to_port(port, message, interval)
+        else:
+            self.connect(port)
+            self._serial_write(message + self.termination, interval)
+
+    def port_readline(self, port):
+        if self.transport == 'addressed':
+            port = str(port)
+            self._wait_for_lines([port])
+            return self._pop_line(port)
+        else:
+            self.connect(port)
+            response = self.serial.readline().strip()
+            self.pacer.received(response)
+            return response
+
+    def discard_port_input(self, port):
+        """
+        Discard the unread responses from the given port and return the number of bytes discarded. In addressed mode,
+        these are in the mainframe queue for the port; in connect mode, they are in the host input buffer.
+        """
+        port = str(port)
+        if self.transport == 'addressed':
+            discarded = self.bytes_waiting(port) + len(self._port_input.get(port, ''))
+            if discarded:
+                self.flush(port)
+        else:
+            self.connect(port)
+            discarded = self.serial.in_waiting
+            self.serial.reset_input_buffer()
+        return discarded
+
+    def send_and_receive_many(self, requests):
+        """
+        Send queries to several modules and return the responses in the same order as the queries.
+
+        In connect mode, the queries are grouped by port, starting with the port that is already connected, so that each
+        port is connected at most once. In addressed mode, all of the queries are sent before any response is read, so
+        the modules process them at the same time. In both modes, queries to the same port are sent in the order given.
+
+        :param requests: a sequence of (module, message) pairs, where module is either a SIM instance or a port.
+        :return: a list of response strings.
+        """
+        return self._call(self._send_and_receive_many, requests)
+
+    def _send_and_receive_many(self, requests):
+        ports = [str(getattr(module, 'port', module)) for module, message in requests]
+        responses = [None] * len(requests)
+        intervals = [getattr(module, 'communication_delay', None) for module, message in requests]
+        if self.transport == 'addressed':
+            for port, interval, (module, message) in zip(ports, intervals, requests):
+                self._send_to_port(port, message, interval)
+            self._wait_for_lines(ports)
+            for n, port in enumerate(ports):
+                responses[n] = self._pop_line(port)
+        else:
+            order = sorted(range(len(requests)), key=lambda n: (ports[n] != self.connected, ports[n]))
+            for n in order:
+                self.port_write(ports[n], requests[n][1], intervals[n])
+                responses[n] = self.port_readline(ports[n])
+        return responses
+
+    # Addressed messaging.
+
+    def send_to_port(self, port, message):
+        """
+        Send a message to the given port without connecting to it.
+
+        This method implements the SNDT command.
+        """
+        self._call(self._send_to_port, port, message)
+
+    def _send_to_port(self, port, message, interval=None):
+        if self.connected is not None:
+            self.disconnect()
+        self._serial_write('SNDT {}, "{}"'.format(port, message) + self.termination, interval)
+
+    def bytes_waiting(self, port):
+        """
+        Return the number of bytes in the mainframe input queue for the given port.
+
+        This method implements the NINP? command.
+        """
+        return int(self.send_and_receive('NINP? {}'.format(port)))
+
+    def get_bytes(self, port, n_bytes):
+        """
+        Remove up to n_bytes from the mainframe input queue for the given port and return them.
+
+        This method implements the GETN? command.
+        """
+        return self._call(self._get_bytes, port, n_bytes)
+
+    def _get_bytes(self, port, n_bytes):
+        self._write('GETN? {}, {}'.format(port, n_bytes))
+        return self.read_definite_length()
+
+    def read_definite_length(self):
+        """
+        Read a definite-length block of the form '#3005hello' from the serial port, followed by a terminator, and return
+        the data. Unlike a line, the data may contain terminators.
+        """
+        header = self.serial.read(2)
+        if len(header) < 2 or header[0] != '#':
+            raise SIMError("Invalid definite-length block header {!r}".format(header))
+        n_digits = int(header[1])
+        n_bytes = int(self.serial.read(n_digits))
+        data = self.serial.read(n_bytes)
+        self.serial.readline()
+        self.pacer.received()  # The responses in the block are counted when they are popped.
+        if len(data) < n_bytes:
+            raise SIMTimeout("Definite-length block ended after {} of {} bytes.".format(len(data), n_bytes))
+        return data
+
+    def _pop_line(self, port):
+        line, self._port_input[port] = self._port_input[port].split('\n', 1)
+        line = line.strip()
+        self.pacer.received(line)
+        return line
+
+    def _wait_for_lines(self, ports, timeout=None):
+        """
+        Fetch bytes from the input queues of the given ports until each port has at least as many complete responses
+        waiting as the number of times it appears in ports. Raise SIMTimeout if this takes longer than timeout, which
+        defaults to the serial port timeout.
+        """
+        needed = dict((port, ports.count(port)) for port in set(ports))
+
+        def fetch():
+            for port, n_lines in list(needed.items()):
+                buffered = self._port_input.get(port, '')
+                if buffered.count('\n') < n_lines:
+                    n_bytes = self.bytes_waiting(port)
+                    if n_bytes:
+                        buffered += self.get_bytes(port, n_bytes)
+                        self._port_input[port] = buffered
+                if buffered.count('\n') >= n_lines:
+                    del needed[port]
+            return not needed
+
+        if timeout is None:
+            timeout = self.serial.timeout
+        wait_for(fetch, timeout, SIMTimeout, "No response from ports {}".format(', '.join(sorted(needed))))
+
     def autodetect(self):
         # Upgrade with methods when available.
         self.send('BRER 510') # Turn on broadcasting for ports 1-8
@@ -235,11 +657,333 @@ class SIM900(SIM):
         lines = [line for line in lines if line] # Remove blank messages
         for line in lines:
             port, message = self.parse_message(line)
-            SRS, sim, serial_number, firmware_version = self.parse_definite_length(message).split(',')
-            try:
-                self.ports[port] = globals()[sim](self.serial, (self, port)) # Update
-            except KeyError as e:
-                self.ports[port] = str(e)
+            self._add_module(port, self.parse_definite_length(message))
+
+    def _add_module(self, port, identification):
+        SRS, sim, serial_number, firmware_version = identification.split(',')
+        try:
+            self.ports[port] = globals()[sim](self.serial, (self, port)) # Update
+        except KeyError as e:
+            self.ports[port] = str(e)
+        self.inventory[port] = {'model': sim, 'serial_number': serial_number}
+
+    def identify_ports(self, ports):
+        """
+        Send an identification query to the given ports at the same time using addressed messages, and wait at most
+        detection_timeout seconds for the responses. Earlier responses queued for these ports are discarded first.
+        This works with either transport.
+
+        :return: a dictionary that maps each port to its identification string, or to None if there was no response.
+        """
+        return self._call(self._identify_ports, [str(port) for port in ports])
+
+    def _identify_ports(self, ports):
+        for port in ports:
+            self.flush(port)  # Discard earlier responses from only the ports being identified.
+            self.send_to_port(port, '*IDN?')
+        try:
+            self._wait_for_lines(ports, self.detection_timeout)
+        except SIMTimeout:
+            pass
+        identifications = {}
+        for port in ports:
+            if '\n' in self._port_input.get(port, ''):
+                identifications[port] = self._pop_line(port)
+            else:
+                identifications[port] = None
+                self.flush(port)  # Discard a late response.
+        return identifications
+
+    def detect(self, port):
+        """
+        Identify the module in the given port and create its instance in ports. If the port is empty, set its entry
+        to None and remember that it is empty. Rewrite inventory_file only if the inventory has changed.
+        """
+        port = str(port)
+        identification = self.identify_ports([port])[port]
+        previous = self.inventory.get(port)
+        if identification is None:
+            self.ports[port] = None
+            self.inventory.pop(port, None)
+            self._empty_ports.add(port)
+        else:
+            self._add_module(port, identification)
+            self._empty_ports.discard(port)
+        if self.inventory_file is not None and self.inventory.get(port) != previous:
+            self.save_inventory()
+        return self.ports[port]
+
+    def module(self, port):
+        """
+        Return the instance for the module in the given port, detecting it first if necessary. A port that was found
+        to be empty is not probed again, so this returns None without waiting; use detect() to probe it again.
+        """
+        port = str(port)
+        if self.ports[port] is None and port not in self._empty_ports:
+            self.detect(port)
+        return self.ports[port]
+
+    def attach(self):
+        """
+        Create the modules recorded in inventory_file, if it exists, then check that each one answers an identification
+        query with the recorded model and serial number. Ports that disagree are detected again and the file is
+        rewritten.
+        """
+        if self.inventory_file is None or not os.path.exists(self.inventory_file):
+            return
+        with open(self.inventory_file) as f:
+            inventory = json.load(f)
+        inventory = dict((str(port), (str(entry['model']), str(entry['serial_number'])))
+                         for port, entry in inventory.items())
+        for port, (model, serial_number) in inventory.items():
+            self._add_module(port, ','.join(['', model, serial_number, '']))
+        identifications = self.identify_ports(list(inventory))
+        changed = False
+        for port, identification in identifications.items():
+            if identification is None:
+                self.ports[port] = None
+                self.inventory.pop(port)
+                self._empty_ports.add(port)
+                changed = True
+            elif tuple(identification.split(',')[1:3]) != inventory[port]:
+                self._add_module(port, identification)
+                changed = True
+        if changed:
+            self.save_inventory()
+
+    def save_inventory(self):
+        """
+        Write the models and serial numbers of the detected modules to inventory_file.
+        """
+        with open(self.inventory_file, 'w') as f:
+            json.dump(self.inventory, f, indent=2, sort_keys=True)
+
+
+class SIMPoller(object):
+    """
+    This class reads a set of quantities from the modules in a SIM900 in a thread, and stores each quantity with host
+    timestamps in its own ColumnStore in the stores dictionary.
+
+    Each quantity is a query sent to one module at its own interval. Queries that are due at the same time are sent
+    together using SIM900.send_and_receive_many(), which groups them by port or, in addressed mode, lets the modules
+    process them in parallel. The timestamp of each value is the midpoint of the exchange. A response that cannot be
+    converted is stored as NaN and counted in the errors attribute. Any other exception stops the poller and is raised
+    again by chunks() and latest().
+
+    For example,
+    poller = SIMPoller(mainframe)
+    poller.add('bridge resistance', mainframe.ports['1'], 'RVAL?', interval=0.5)
+    poller.add('diode 2 temperature', mainframe.ports['3'], 'TVAL? 2', interval=5)
+    poller.start()
+    for chunk in poller.chunks():
+        timestamps, values = chunk['bridge resistance']
+    """
+
+    def __init__(self, mainframe, initial_capacity=1024):
+        self.mainframe = mainframe
+        self.initial_capacity = initial_capacity
+        self.quantities = OrderedDict()
+        self.stores = OrderedDict()
+        self.errors = 0
+        self._new_data = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._finished = True
+        self._exception = None
+
+    def add(self, name, module, message, interval=1, converter=float):
+        """
+        Add a quantity to poll.
+
+        :param name: the key for the quantity in stores, chunks, and latest().
+        :param module: a SIM instance or a port.
+        :param message: the query to send, such as 'TVAL?'.
+        :param interval: the time between queries in seconds.
+        :param converter: a function that converts the response string to a number.
+        """
+        if self.running:
+            raise SIMError("Stop the poller before adding quantities.")
+        self.quantities[name] = (module, message, interval, converter)
+        self.stores[name] = ColumnStore(1, self.initial_capacity)
+
+    @property
+    def running(self):
+        return not self._finished
+
+    def start(self):
+        if self.running:
+            raise SIMError("Poller already running.")
+        self._stop.clear()
+        self._finished = False
+        self._exception = None
+        self._thread = threading.Thread(target=self._poll, name='SIM900 poller')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _poll(self):
+        try:
+            due_times = dict((name, time.time()) for name in self.quantities)
+            while not self._stop.is_set():
+                now = time.time()
+                due = [name for name in self.quantities if due_times[name] <= now]
+                if due:
+                    try:
+                        responses = self.mainframe.send_and_receive_many([self.quantities[name][:2] for name in due])
+                    except SIMTimeout:
+                        responses = [''] * len(due)
+                    timestamp = (now + time.time()) / 2
+                    for name, response in zip(due, responses):
+                        module, message, interval, converter = self.quantities[name]
+                        try:
+                            value = converter(response)
+                        except (ValueError, TypeError):
+                            value = np.nan
+                            self.errors += 1
+                        self.stores[name].append(timestamp, value)
+                        due_times[name] = max(due_times[name] + interval, now)
+                    with self._new_data:
+                        self._new_data.notify_all()
+                if due_times:
+                    self._stop.wait(max(0, min(due_times.values()) - time.time()))
+                else:
+                    self._stop.wait()
+        except Exception as e:
+            self._exception = e
+        finally:
+            with self._new_data:
+                self._finished = True
+                self._new_data.notify_all()
+
+    def _raise_exception(self):
+        if self._exception is not None:
+            raise self._exception
+
+    def _read_new(self, positions):
+        chunk = OrderedDict()
+        for name, store in self.stores.items():
+            timestamps, data = store.read(positions.get(name, 0))
+            positions[name] = positions.get(name, 0) + timestamps.size
+            chunk[name] = (timestamps, data[:, 0])
+        return chunk
+
+    def chunks(self):
+        """
+        Yield, each time new values are stored, an OrderedDict that maps each quantity name to a tuple of arrays
+        (timestamps, values) containing the values stored since the previous chunk. Stop after the poller stops, or
+        raise the exception that stopped it.
+        """
+        positions = {}
+        while True:
+            with self._new_data:
+                if not self._finished and all(len(store) == positions.get(name, 0)
+                                              for name, store in self.stores.items()):
+                    self._new_data.wait()
+                finished = self._finished
+            chunk = self._read_new(positions)
+            if any(timestamps.size for timestamps, values in chunk.values()):
+                yield chunk
+            elif finished:
+                self._raise_exception()
+                return
+
+    def latest(self):
+        """
+        Return an OrderedDict that maps each quantity name to a tuple (timestamp, value) for its most recent value, or
+        to None if it has not been read yet. Raise the exception that stopped the poller, if any.
+        """
+        self._raise_exception()
+        snapshot = OrderedDict()
+        for name, store in self.stores.items():
+            row = store.latest()
+            snapshot[name] = None if row is None else (row[0], row[1][0])
+        return snapshot
+
+
+class SIMStreaming(object):
+    """
+    This is a mixin class for modules that send several measurements in response to one query. A background thread
+    reads blocks of measurements, each in one exclusive call to the mainframe, and writes them into the ring buffer
+    stream_buffer, so other modules, and other commands to the same module, can be served between blocks.
+    """
+
+    _stream_thread = None
+    _stream_stop = None
+
+    @property
+    def streaming(self):
+        return self._stream_thread is not None
+
+    def _start_stream(self, n_columns, capacity, read_block, args):
+        """
+        Start the thread, which calls read_block(*args) repeatedly. This must return a one-dimensional array of
+        timestamps and an array of values with n_columns columns.
+        """
+        if self.streaming:
+            raise SIMError("Already streaming.")
+        self.stream_buffer = RingBuffer(capacity, n_columns)
+        self._stream_error = None
+        self._stream_stop = threading.Event()
+        self._stream_thread = threading.Thread(target=self._stream, args=(read_block, args))
+        self._stream_thread.daemon = True
+        self._stream_thread.start()
+
+    def _stream(self, read_block, args):
+        try:
+            while not self._stream_stop.is_set():
+                self.stream_buffer.write(*self._call(read_block, *args))
+        except Exception as e:
+            self._stream_error = e
+
+    def _read_samples(self, message, n_samples, period=None):
+        """
+        Send a query for n_samples values and return an array of their timestamps and an array of the values. If
+        reading fails partway through, stop the output and discard the values that are still arriving, so that later
+        responses are not shifted, then raise the error.
+
+        The values are sampled at a constant period, but their arrival times also include the latency of the query
+        and of the host, so the timestamps are spaced evenly, ending at the last arrival time.
+
+        :param period: the time between values in seconds; if None, it is estimated from the first and last arrival
+          times.
+        """
+        complete = False
+        try:
+            self._write(message)
+            arrivals = np.empty(n_samples)
+            values = np.empty(n_samples)
+            for n in range(n_samples):
+                values[n] = float(self._readline())
+                arrivals[n] = time.time()
+            complete = True
+        finally:
+            if not complete:
+                self._write('SOUT')
+                self._discard_input()
+        if n_samples < 2:
+            return arrivals, values
+        if period is None:
+            period = (arrivals[-1] - arrivals[0]) / (n_samples - 1)
+        return arrivals[-1] - period * np.arange(n_samples - 1, -1, -1), values
+
+    def _read_stream(self):
+        if self._stream_error is not None:
+            raise SIMError("Streaming failed: {}".format(self._stream_error))
+        return self.stream_buffer.read()
+
+    def stop_streaming(self):
+        """
+        Stop streaming after the current block completes. Do nothing if not streaming.
+        """
+        if not self.streaming:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
 
 
 class SIMThermometer(SIM):
@@ -259,6 +1003,12 @@ class SIMThermometer(SIM):
     # errors of up to 1.2e-5 or so.
     maximum_fractional_error = 1e-4
 
+    # This is the number of CAPT? queries that read_curve() sends before it reads the first response.
+    curve_queries_in_flight = 8
+
+    # This is the number of times that a curve point is sent before write_curve() or update_curve() gives up.
+    write_attempts = 3
+
     # Consider adding enumeration of allowable curve numbers.
     def curve_info(self, number):
         message = self.send_and_receive('CINI? {}'.format(number)).split(',')
@@ -270,51 +1020,158 @@ class SIMThermometer(SIM):
     def initialize_curve(self, number, format, identification):
         self.send('CINI {}, {}, {}'.format(number, format, identification))
 
-    def read_curve(self, number):
+    def read_curve(self, number, in_flight=None):
+        """
+        Read a calibration curve in one exclusive call to the mainframe, keeping in_flight CAPT? queries outstanding
+        so that the module never waits for the host. The default is curve_queries_in_flight; use 1 to send each query
+        only after the previous response arrives.
+        """
         format, identification, points = self.curve_info(number)
-        sensor = []
-        temperature = []
-        # The indexing is one-based.
-        for n in range(1, points + 1):
-            # The SIM921 separator is a comma, as its manual says, but
-            # the SIM922 separator is a space and its manual lies.
-            message = self.send_and_receive('CAPT? {}, {}'.format(number, n)).split(self.CAPT_separator)
-            sensor.append(float(message[0]))
-            temperature.append(float(message[1]))
+        sensor, temperature = self._read_points(number, 0, points, in_flight)
         return CalibrationCurve(sensor, temperature, identification, format)
 
+    def _read_points(self, number, start, stop, in_flight=None):
+        """
+        Return arrays of the sensor and temperature values of points start through stop - 1, counting from zero.
+        """
+        if in_flight is None:
+            in_flight = self.curve_queries_in_flight
+        return self._call(self._read_curve_points, number, start, stop, max(1, int(in_flight)))
+
+    def _read_curve_points(self, number, start, stop, in_flight):
+        sensor = np.empty(stop - start)
+        temperature = np.empty(stop - start)
+        complete = False
+        try:
+            for n in range(start, min(start + in_flight, stop)):
+                self._write('CAPT? {}, {}'.format(number, n + 1))  # The indexing is one-based.
+            for n in range(start, stop):
+                # The SIM921 separator is a comma, as its manual says, but
+                # the SIM922 separator is a space and its manual lies.
+                message = self._readline().split(self.CAPT_separator)
+                if n + in_flight < stop:
+                    self._write('CAPT? {}, {}'.format(number, n + in_flight + 1))
+                sensor[n - start] = float(message[0])
+                temperature[n - start] = float(message[1])
+            complete = True
+        finally:
+            if not complete:
+                self._discard_input()  # Discard the responses to the queries still in flight.
+        return sensor, temperature
+
+    def _stored_points(self, number):
+        return int(self._send_and_receive('CINI? {}'.format(number)).split(',')[2])
+
+    def _append_point(self, number, curve, n):
+        """
+        Send point n of the curve, counting from zero, and wait until the module reports that it has stored n + 1
+        points. If it has not after write_delay seconds, read the number of stored points again, since the point may
+        have been stored late, and send the point again only if it is still missing. After a point is sent again, wait
+        up to write_delay seconds more for a second copy to be stored.
+
+        :return: True if the curve contains exactly n + 1 points, or False if it contains more, because a point that
+          was sent again was stored twice; the curve must then be rewritten.
+        """
+        message = 'CAPT {}, {}, {}'.format(number, curve.sensor[n], curve.temperature[n])
+        for attempt in range(self.write_attempts):
+            self._write(message)
+            try:
+                wait_for(lambda: self._stored_points(number) > n, self.write_delay, SIMTimeout,
+                         "Point {} not stored.".format(n), initial_interval=0.01)
+            except SIMTimeout:
+                pass
+            stored = self._stored_points(number)
+            if stored > n + 1:
+                return False
+            elif stored == n + 1:
+                if not attempt:
+                    return True
+                # The copy that was sent first may have been stored late, ahead of the one sent last, which is then
+                # still on its way; it would make the next point appear stored.
+                try:
+                    wait_for(lambda: self._stored_points(number) > n + 1, self.write_delay, SIMTimeout,
+                             "Point {} stored once.".format(n), initial_interval=0.01)
+                except SIMTimeout:
+                    return True
+                return False
+        raise SIMError("Point {} was not stored after {} attempts.".format(n, self.write_attempts))
+
+    def _matching_points(self, sensor, temperature, curve, start=0):
+        """
+        Return a boolean array that is True where the given points match the points of the curve from start onward
+        within maximum_fractional_error.
+        """
+        stop = start + sensor.size
+        return ((abs(sensor / curve.sensor[start:stop] - 1) < self.maximum_fractional_error) &
+                (abs(temperature / curve.temperature[start:stop] - 1) < self.maximum_fractional_error))
+
+    def _write_points(self, number, curve, start):
+        """
+        Append points start onward to the stored curve, confirming each point, then read back only those points and
+        check the format, identification, and number of points of the stored curve. If a point is stored twice, start
+        the curve again, at most write_attempts times.
+        """
+        n = start
+        rewrites = 0
+        while n < curve.sensor.size:
+            if self._call(self._append_point, number, curve, n):
+                n += 1
+            elif rewrites < self.write_attempts:
+                rewrites += 1
+                self.initialize_curve(number, curve.format, curve.identification)
+                start = n = 0
+            else:
+                raise SIMError("Curve {} still contained duplicate points after {} rewrites.".format(number, rewrites))
+        sensor, temperature = self._read_points(number, start, curve.sensor.size)
+        if not np.all(self._matching_points(sensor, temperature, curve, start)):
+            raise SIMError("Curve data was not written correctly.")
+        if self.curve_info(number) != (curve.format, curve.identification, curve.sensor.size):
+            raise SIMError("Curve {} was not initialized correctly.".format(number))
+
     def write_curve(self, number, curve):
+        """
+        Write the curve, replacing the stored curve. Each point is sent only after the module confirms the previous
+        one, and the stored curve is read back and checked at the end.
+        """
         if curve.sensor.size > self.maximum_temperature_points:
             raise SIMError("Curve contains too many points.")
         self.initialize_curve(number, curve.format, curve.identification)
-        if self.parent is not None:
-            self.parent.connect(self.port)
-        for n in range(curve.sensor.size):
-            self.serial.write('CAPT {}, {}, {}{}'.format(number, curve.sensor[n], curve.temperature[n], self.termination))
-            time.sleep(self.write_delay)
-        if self.parent is not None:
-            self.parent.disconnect()
-        if not self.validate_curve(number, curve):
-            raise SIMError("Curve data was not written correctly.")
+        self._write_points(number, curve, 0)
+
+    def update_curve(self, number, curve):
+        """
+        Make the stored curve match the given curve, writing as few points as possible.
+
+        The hardware can only append points to a curve or start a new one, so if the stored curve has the same format
+        and identification and its points match the first points of the curve within maximum_fractional_error, only
+        the remaining points are appended; otherwise, the curve is written from the first point. Only the points that
+        were written are read back and checked.
+
+        :return: the number of points written.
+        """
+        if curve.sensor.size > self.maximum_temperature_points:
+            raise SIMError("Curve contains too many points.")
+        stored = self.read_curve(number)
+        if (stored.format == curve.format and stored.identification == curve.identification and
+                stored.sensor.size <= curve.sensor.size and
+                np.all(self._matching_points(stored.sensor, stored.temperature, curve))):
+            start = stored.sensor.size
+        else:
+            self.initialize_curve(number, curve.format, curve.identification)
+            start = 0
+        if start < curve.sensor.size:
+            self._write_points(number, curve, start)
+        return curve.sensor.size - start
 
     def validate_curve(self, number, curve):
-        format, identification, points = self.curve_info(number)
         stored = self.read_curve(number)
-        # If the writing speed is too fast some points may be skipped,
-        # which will cause the array comparisons below to raise a
-        # ValueError.
-        try:
-            return (np.all(abs(stored.sensor / curve.sensor - 1) <
-                           self.maximum_fractional_error) and
-                    np.all(abs(stored.temperature / curve.temperature - 1) <
-                           self.maximum_fractional_error) and
-                    (stored.identification == curve.identification) and
-                    (stored.format == curve.format))
-        except ValueError:
-            return False
+        return (stored.sensor.size == curve.sensor.size and
+                np.all(self._matching_points(stored.sensor, stored.temperature, curve)) and
+                (stored.identification == curve.identification) and
+                (stored.format == curve.format))
 
 
-class SIM921(SIMThermometer):
+class SIM921(SIMThermometer, SIMStreaming):
     """AC Resistance Bridge"""
 
     # The documentation for the CAPT command is correct.
@@ -325,13 +1182,30 @@ class SIM921(SIMThermometer):
     # more points.
     maximum_temperature_points = 225
 
-    # This is in seconds; points were occasionally dropped at 0.1 seconds.
+    # This is the time in seconds to wait for a curve point to be stored before sending it again. With a fixed delay
+    # between points instead, points were occasionally dropped at 0.1 seconds.
     write_delay = 0.5
 
+    # This is the maximum time in seconds that autorange_gain() waits for the cycle to complete.
+    autorange_timeout = 30
+
     # Minimum and maximum excitation frequencies in Hz:
     minimum_frequency = 1.95
     maximum_frequency = 61.1
 
+    # These are the queries that read_samples() and start_streaming() accept.
+    sample_queries = ('RVAL', 'RDEV', 'TVAL', 'TDEV')
+
+    # This maps the time constant codes to seconds; code -1 turns the filter off.
+    time_constant_integer_to_seconds = {-1: 0,
+                                        0: 0.3,
+                                        1: 1,
+                                        2: 3,
+                                        3: 10,
+                                        4: 30,
+                                        5: 100,
+                                        6: 300}
+
     def __str__(self):
         return "SIM921 AC Resistance Bridge"
 
@@ -438,7 +1312,7 @@ class SIM921(SIMThermometer):
 
         This property implements the RVAL? command.
 
-        Multiple measurements and streaming are not yet implemented.
+        Use read_samples() for multiple measurements and start_streaming() for streaming.
         """
         return float(self.send_and_receive('RVAL?'))
 
@@ -449,7 +1323,7 @@ class SIM921(SIMThermometer):
 
         This property implements the RDEV? command.
 
-        Multiple measurements and streaming are not yet implemented.
+        Use read_samples() for multiple measurements and start_streaming() for streaming.
         """
         return float(self.send_and_receive('RDEV?'))
 
@@ -460,7 +1334,7 @@ class SIM921(SIMThermometer):
 
         This property implements the TVAL? command.
 
-        Multiple measurements and streaming are not yet implemented.
+        Use read_samples() for multiple measurements and start_streaming() for streaming.
         """
         return float(self.send_and_receive('TVAL?'))
 
@@ -471,15 +1345,108 @@ class SIM921(SIMThermometer):
 
         This property implements the TDEV? command.
 
-        Multiple measurements and streaming are not yet implemented.
+        Use read_samples() for multiple measurements and start_streaming() for streaming.
         """
         return float(self.send_and_receive('TDEV?'))
 
     # The PHAS? command is not yet implemented.
 
-    # The TPER(?) command is not yet implemented.
+    # This is the output period in milliseconds last read from the bridge, or None if it has not been read since it was
+    # last set; read_samples() and start_streaming() check it without sending TPER? each time.
+    _output_period = None
+
+    @property
+    def output_period(self):
+        """
+        The time between streamed values, in milliseconds.
+
+        This property implements the TPER(?) command.
+        """
+        self._output_period = int(self.send_and_receive('TPER?'))
+        return self._output_period
 
-    # The SOUT command is not yet implemented.
+    @output_period.setter
+    def output_period(self, milliseconds):
+        self._output_period = None  # The bridge may round or reject the value, so read it again when it is needed.
+        self.send('TPER {}'.format(int(milliseconds)))
+
+    def reset(self):
+        self._output_period = None
+        super(SIM921, self).reset()
+
+    def stop_output(self):
+        """
+        Stop any values that the bridge is still streaming.
+
+        This method implements the SOUT command.
+        """
+        self.send('SOUT')
+
+    def _query_samples(self, query, n_samples):
+        period = None if self._output_period is None else self._output_period / 1000
+        return self._read_samples('{}? {}'.format(query, n_samples), n_samples, period)
+
+    def _validate_sample_query(self, query):
+        """
+        Check the query and that the bridge sends values more often than the serial timeout; otherwise, each wait for
+        a value would time out and abort the block. The output period is read from the bridge only if it is not cached.
+        """
+        if query not in self.sample_queries:
+            raise SIMValueError("Valid queries are {}".format(', '.join(self.sample_queries)))
+        if self._output_period is None:
+            self.output_period
+        period = self._output_period / 1000
+        if self.serial.timeout is not None and period >= self.serial.timeout:
+            raise SIMValueError("The output period of {} s must be shorter than the serial timeout of {} s."
+                                .format(period, self.serial.timeout))
+
+    def read_samples(self, n_samples, query='RVAL'):
+        """
+        Ask the bridge for n_samples consecutive values in one query; the bridge sends one value every output_period.
+
+        This method implements the RVAL?, RDEV?, TVAL?, and TDEV? commands with a count.
+
+        :param n_samples: the number of values.
+        :param query: one of sample_queries.
+        :return: a float array of the values.
+        """
+        self._validate_sample_query(query)
+        timestamps, values = self._call(self._query_samples, query, int(n_samples))
+        return values
+
+    def start_streaming(self, query='RVAL', capacity=2 ** 16, block_samples=10):
+        """
+        Start streaming values into a ring buffer that is filled by a background thread. Use read_stream() to collect
+        the data and stop_streaming() to stop.
+
+        The thread requests block_samples values at a time with one query each, and timestamps the values one
+        output_period apart, ending when the last one arrives. Between blocks, other modules in the mainframe, and other
+        commands to this bridge, can be served.
+
+        :param query: one of sample_queries.
+        :param capacity: the number of values the ring buffer holds.
+        :param block_samples: the number of values per query.
+        """
+        self._validate_sample_query(query)
+        self._start_stream(1, capacity, self._query_samples, (query, int(block_samples)))
+
+    def read_stream(self):
+        """
+        Return all values streamed since the previous call, without blocking.
+
+        :return: two float arrays containing the timestamps and the values.
+        """
+        timestamps, values = self._read_stream()
+        return timestamps, values[:, 0]
+
+    def stop_streaming(self):
+        """
+        Stop streaming after the current block completes. Do nothing if not streaming.
+        """
+        if not self.streaming:
+            return
+        super(SIM921, self).stop_streaming()
+        self.stop_output()
 
     @property
     def display(self):
@@ -592,11 +1559,13 @@ class SIM921(SIMThermometer):
 
         This method implements the AGAI(?) command.
 
-        This method will return only when the autorange cycle completes.
+        This method will return only when the autorange cycle completes, and raises SIMTimeout if it takes longer than
+        autorange_timeout seconds.
         """
         self.send('AGAI ON')
-        while self._boolean_output(self.send_and_receive('AGAI?')):
-            time.sleep(0.5)
+        wait_for(lambda: not self._boolean_output(self.send_and_receive('AGAI?')), self.autorange_timeout, SIMTimeout,
+                 "Gain autorange still in progress after {} seconds.".format(self.autorange_timeout),
+                 initial_interval=0.1, maximum_interval=0.5)
 
     @property
     def autorange_display(self):
@@ -717,7 +1686,8 @@ class SIM922(SIMThermometer):
     # channel, but I haven't checked it yet.
     maximum_temperature_points = 256
 
-    # This is in seconds; points were sometimes dropped at 0.5 seconds and below.
+    # This is the time in seconds to wait for a curve point to be stored before sending it again. With a fixed delay
+    # between points instead, points were sometimes dropped at 0.5 seconds and below.
     write_delay = 1
 
     def __str__(self):
@@ -729,6 +1699,39 @@ class SIM922(SIMThermometer):
     def temperature(self, channel):
         return float(self.send_and_receive('TVAL? {}'.format(channel)))
 
+    # Channel 0 means all four channels, which the module returns in one comma-separated response.
+
+    def _parse_channels(self, response):
+        return np.array([float(value) for value in response.split(',')])
+
+    def voltages(self):
+        """
+        Return an array of the diode voltages of all four channels, read with one query.
+
+        This method implements the VOLT? 0 command.
+        """
+        return self._parse_channels(self.send_and_receive('VOLT? 0'))
+
+    def temperatures(self):
+        """
+        Return an array of the temperatures of all four channels, read with one query.
+
+        This method implements the TVAL? 0 command.
+        """
+        return self._parse_channels(self.send_and_receive('TVAL? 0'))
+
+    def _snapshot(self):
+        self._write('VOLT? 0')
+        self._write('TVAL? 0')
+        return self._parse_channels(self._readline()), self._parse_channels(self._readline())
+
+    def snapshot(self):
+        """
+        Return arrays of the voltages and temperatures of all four channels. Both queries are sent before either
+        response is read, in one exclusive call to the mainframe.
+        """
+        return self._call(self._snapshot)
+
     def get_curve_type(self, channel):
         return self.send_and_receive('CURV? {}'.format(channel))
 
@@ -740,9 +1743,159 @@ class SIM922(SIMThermometer):
 
 class SIM925(SIM):
     """Octal Four-Wire Multiplexer"""
+
+    channels = (1, 2, 3, 4, 5, 6, 7, 8)
+
     def __str__(self):
         return "SIM925 Octal Four-Wire Multiplexer"
 
+    @property
+    def channel(self):
+        """
+        The connected channel, 1 through 8, or 0 if no channel is connected.
+
+        This property implements the CHAN(?) command.
+        """
+        return int(self.send_and_receive('CHAN?'))
+
+    @channel.setter
+    def channel(self, channel):
+        if not int(channel) in (0,) + self.channels:
+            raise SIMValueError("Valid channels are integers 0 through 8.")
+        self.send('CHAN {}'.format(int(channel)))
+
+
+class SIM921Scanner(object):
+    """
+    This class scans thermometers connected through a SIM925 multiplexer to a SIM921 bridge, and stores the resistance
+    and temperature of each channel with host timestamps in its own ColumnStore in the stores dictionary.
+
+    Each channel has its own bridge range, excitation, and calibration curve. Channels with identical settings are
+    scanned one after another, starting with the settings the bridge already has, and only the settings that differ
+    from the previous channel are sent. After each change, the scanner waits for the time the bridge output needs to
+    settle to within settling_accuracy, computed from the bridge time constant, and no longer. The scanner assumes that
+    nothing else changes these settings while it runs.
+
+    For example,
+    scanner = SIM921Scanner(mainframe.ports['1'], mainframe.ports['2'])
+    scanner.add_channel(1, 'mixing chamber', range=5, excitation=2, curve=1)
+    scanner.add_channel(2, 'still', range=4, excitation=3, curve=2)
+    scanner.run(10)
+    timestamps, values = scanner.stores['still'].read()
+    """
+
+    # The bridge output settles exponentially, so it takes log(1 / accuracy) time constants to settle to accuracy.
+    settling_accuracy = 1e-3
+
+    def __init__(self, bridge, multiplexer, initial_capacity=1024):
+        self.bridge = bridge
+        self.multiplexer = multiplexer
+        self.initial_capacity = initial_capacity
+        self.channels = OrderedDict()
+        self.stores = OrderedDict()
+        self._bridge_settings = None
+        self._multiplexer_channel = None
+
+    def add_channel(self, channel, name=None, range=None, excitation=None, curve=None):
+        """
+        Add a multiplexer channel to the scan. Settings that are None take the values that the bridge has when the
+        first scan starts, and keep them in later scans, whatever order the channels are scanned in.
+
+        :param name: the key for the channel in stores and latest(); the default is the channel number.
+        :param range: the SIM921 range code.
+        :param excitation: the SIM921 excitation code.
+        :param curve: the SIM921 calibration curve number.
+        """
+        if not int(channel) in self.multiplexer.channels:
+            raise SIMValueError("Valid channels are integers 1 through 8.")
+        if name is None:
+            name = int(channel)
+        self.channels[name] = (int(channel), {'range': range, 'excitation': excitation, 'active_curve': curve})
+        self.stores[name] = ColumnStore(2, self.initial_capacity)
+
+    def settling_time(self, time_constant=None):
+        """
+        Return the time in seconds for the bridge output to settle to within settling_accuracy after a change.
+
+        :param time_constant: the time constant code; if None, read it from the bridge.
+        """
+        if time_constant is None:
+            time_constant = self.bridge.time_constant
+        return (self.bridge.time_constant_integer_to_seconds[time_constant] *
+                math.log(1 / self.settling_accuracy))
+
+    def _settings_key(self, name):
+        # Settings may be None or either an integer or a string, which do not compare with each other on Python 3.
+        settings = self.channels[name][1]
+        return tuple((key, settings[key] is None, str(settings[key])) for key in sorted(settings))
+
+    def order(self):
+        """
+        Return the channel names in scan order: grouped by settings, starting with the group that matches the current
+        bridge settings.
+        """
+        current = self._bridge_settings or {}
+        return sorted(self.channels, key=lambda name: (bool(self._changes(name, current)), self._settings_key(name)))
+
+    def _changes(self, name, current):
+        """
+        Return a dictionary of the settings for the given channel that differ from the current settings.
+        """
+        return dict((key, value) for key, value in self.channels[name][1].items()
+                    if value is not None and str(current.get(key)) != str(value))
+
+    def scan(self):
+        """
+        Measure every channel once, store the results, and return an OrderedDict that maps each channel name to a
+        tuple (timestamp, resistance, temperature).
+        """
+        if self._bridge_settings is None:
+            self._bridge_settings = dict((key, getattr(self.bridge, key)) for key in ('range', 'excitation',
+                                                                                      'active_curve'))
+            self._multiplexer_channel = self.multiplexer.channel
+        for channel, settings in self.channels.values():
+            for key, value in settings.items():
+                if value is None:
+                    settings[key] = self._bridge_settings[key]
+        settling_time = self.settling_time()
+        results = OrderedDict()
+        for name in self.order():
+            channel, settings = self.channels[name]
+            changes = self._changes(name, self._bridge_settings)
+            if channel != self._multiplexer_channel or changes:
+                if channel != self._multiplexer_channel:
+                    self.multiplexer.channel = channel
+                    self._multiplexer_channel = channel
+                for key, value in changes.items():
+                    setattr(self.bridge, key, value)
+                    self._bridge_settings[key] = value
+                time.sleep(settling_time)
+            start = time.time()
+            resistance = self.bridge.resistance
+            temperature = self.bridge.temperature
+            timestamp = (start + time.time()) / 2
+            self.stores[name].append(timestamp, (resistance, temperature))
+            results[name] = (timestamp, resistance, temperature)
+        return results
+
+    def run(self, n_scans):
+        """
+        Scan all channels n_scans times.
+        """
+        for n in range(n_scans):
+            self.scan()
+
+    def latest(self):
+        """
+        Return an OrderedDict that maps each channel name to a tuple (timestamp, resistance, temperature) for its most
+        recent measurement, or to None if it has not been measured yet.
+        """
+        snapshot = OrderedDict()
+        for name, store in self.stores.items():
+            row = store.latest()
+            snapshot[name] = None if row is None else (row[0], row[1][0], row[1][1])
+        return snapshot
+
 
 class SIM960(SIM):
     """Analog PID Controller"""
@@ -750,11 +1903,110 @@ class SIM960(SIM):
         return "SIM960 Analog PID Controller"
 
 
-class SIM970(SIM):
+class SIM970(SIM, SIMStreaming):
     """Quad Digital Voltmeter"""
+
+    channels = (1, 2, 3, 4)
+
     def __str__(self):
         return "SIM970 Quad Digital Voltmeter"
 
+    def _validate_channel(self, channel):
+        if not int(channel) in self.channels:
+            raise SIMValueError("Valid channels are integers 1 through 4.")
+        return int(channel)
+
+    # The CHAN, RNGE, and ARNG commands are not yet implemented: their syntax has not been checked against the manual.
+
+    def voltage(self, channel):
+        """
+        Return the voltage of the given channel.
+
+        This method implements the VOLT? command.
+        """
+        return float(self.send_and_receive('VOLT? {}'.format(self._validate_channel(channel))))
+
+    def _query_samples(self, channel, n_samples):
+        return self._read_samples('VOLT? {}, {}'.format(channel, n_samples), n_samples)
+
+    def read_samples(self, channel, n_samples):
+        """
+        Ask for n_samples consecutive voltages from the given channel in one query.
+
+        This method implements the VOLT? command with a count.
+
+        :return: a float array of the voltages.
+        """
+        timestamps, values = self._call(self._query_samples, self._validate_channel(channel), int(n_samples))
+        return values
+
+    def _query_channels(self, channels, n_samples):
+        """
+        Return an array of timestamps and an array of voltages, both of shape (n_samples, len(channels)).
+
+        For one sample, single queries to all channels are sent before any response is read. For several samples, each
+        channel is read with one VOLT? query for all of its samples; a query for several samples would be interrupted
+        by the next query, so the channels are read one after another, and each channel has its own timestamps, spaced
+        evenly between the first and last arrival of its values.
+        """
+        timestamps = np.empty((n_samples, len(channels)))
+        values = np.empty((n_samples, len(channels)))
+        if n_samples == 1:
+            complete = False
+            try:
+                for channel in channels:
+                    self._write('VOLT? {}'.format(channel))
+                for m in range(len(channels)):
+                    values[0, m] = float(self._readline())
+                    timestamps[0, m] = time.time()
+                complete = True
+            finally:
+                if not complete:
+                    self._discard_input()  # Discard the responses to the queries still in flight.
+        else:
+            for m, channel in enumerate(channels):
+                timestamps[:, m], values[:, m] = self._query_samples(channel, n_samples)
+        return timestamps, values
+
+    def _query_stream_block(self, channels, n_samples):
+        timestamps, values = self._query_channels(channels, n_samples)
+        return timestamps.mean(axis=1), np.hstack((timestamps, values))
+
+    def voltages(self, channels=None):
+        """
+        Return an array of the voltages of the given channels, or of all channels if channels is None, read in one
+        exclusive call to the mainframe with all queries sent before any response is read.
+        """
+        if channels is None:
+            channels = self.channels
+        timestamps, values = self._call(self._query_channels, [self._validate_channel(c) for c in channels], 1)
+        return values[0]
+
+    def start_streaming(self, channels=None, capacity=2 ** 16, block_samples=10):
+        """
+        Start streaming voltages from the given channels, or from all channels if channels is None, into a ring buffer
+        that is filled by a background thread. Use read_stream() to collect the data and stop_streaming() to stop.
+
+        Each block contains block_samples rows, read in one exclusive call to the mainframe with one query per channel;
+        with block_samples=1, the queries to all channels are sent before any response is read. See _query_channels().
+
+        :param capacity: the number of rows the ring buffer holds.
+        """
+        if channels is None:
+            channels = self.channels
+        channels = [self._validate_channel(channel) for channel in channels]
+        self._start_stream(2 * len(channels), capacity, self._query_stream_block, (channels, int(block_samples)))
+
+    def read_stream(self):
+        """
+        Return all voltages streamed since the previous call, without blocking.
+
+        :return: an array of timestamps and an array of voltages, each with one column per channel.
+        """
+        row_timestamps, data = self._read_stream()
+        n_channels = data.shape[1] // 2
+        return data[:, :n_channels], data[:, n_channels:]
+
 
 class CalibrationCurve(object):
 
@@ -776,6 +2028,46 @@ class CalibrationCurve(object):
             raise SIMError("Identification string may be at most 15 characters.")
         self.identification = str(identification).upper()
         self.format = str(format)
+        self._tables = None
+
+    def _interpolation_tables(self):
+        """
+        Return the logarithms of the points, ordered for conversion in each direction. They are computed on first use
+        and cached, so the sensor and temperature arrays should not be modified in place afterward.
+        """
+        if self._tables is None:
+            if np.any(self.sensor <= 0) or np.any(self.temperature <= 0):
+                raise SIMError("Log-log interpolation requires positive sensor and temperature values.")
+            log_sensor = np.log(self.sensor)
+            log_temperature = np.log(self.temperature)
+            order = np.argsort(log_temperature)
+            if np.any(np.diff(log_temperature[order]) <= 0):
+                raise SIMError("Temperature values must be monotonic for conversion to sensor values.")
+            self._tables = (log_sensor, log_temperature, log_temperature[order], log_sensor[order])
+        return self._tables
+
+    def to_temperature(self, sensor):
+        """
+        Convert sensor values, such as resistances or diode voltages, to temperatures by linear interpolation between
+        the curve points in log-log space. Values outside the range of the curve convert to NaN.
+
+        :param sensor: a number or an array of any shape.
+        :return: a float or an array of the same shape.
+        """
+        log_sensor, log_temperature, sorted_log_temperature, sorted_log_sensor = self._interpolation_tables()
+        return np.exp(np.interp(np.log(sensor), log_sensor, log_temperature, left=np.nan, right=np.nan))
+
+    def to_sensor(self, temperature):
+        """
+        Convert temperatures to sensor values, for use as setpoints, by the inverse of to_temperature(). The
+        temperature values of the curve must be monotonic.
+
+        :param temperature: a number or an array of any shape.
+        :return: a float or an array of the same shape.
+        """
+        log_sensor, log_temperature, sorted_log_temperature, sorted_log_sensor = self._interpolation_tables()
+        return np.exp(np.interp(np.log(temperature), sorted_log_temperature, sorted_log_sensor, left=np.nan,
+                                right=np.nan))
 
 
 def load_curve(filename, format='0'):
@@ -791,3 +2083,154 @@ def save_curve(directory, curve, format=('%.5f\t%.5f'), newline='\r\n', extensio
     columns[:, 1] = curve.temperature
     np.savetxt(filename, columns, fmt=format, newline=newline)
     return filename
+
+
+class CurveLibrary(object):
+    """
+    This class stores many calibration curves in a single binary .npz file, as one array of all the points and an
+    index. Each curve is identified by its identification string, format, sensor serial number, and a hash of its
+    points, and can be found by identification in constant time. Adding a curve with different points but the same
+    identification, format, and serial number replaces the stored one, so a corrected curve supersedes the original.
+    The points are read from the file only when the first curve is requested.
+
+    For example,
+    library = CurveLibrary('curves.npz')
+    library.import_directory('curves')
+    library.save()
+    curve = library.get('RX102A')
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._entries = []
+        self._by_key = {}
+        self._by_identification = {}
+        self._points = None
+        self._new_points = []
+        self._n_points = 0
+        if os.path.exists(filename):
+            self._file = np.load(filename)
+            for entry in json.loads(str(self._file['index'])):
+                self._add_entry(entry)
+            self._n_points = max([entry['stop'] for entry in self._entries] + [0])
+        else:
+            self._file = None
+            self._points = np.empty((0, 2))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, identification):
+        return str(identification).upper() in self._by_identification
+
+    @staticmethod
+    def curve_hash(curve):
+        """
+        Return a hexadecimal hash of the sensor and temperature values of the curve.
+        """
+        points = np.column_stack((curve.sensor, curve.temperature)).astype(np.float64)
+        return hashlib.sha1(np.ascontiguousarray(points).tobytes()).hexdigest()[:16]
+
+    def _add_entry(self, entry):
+        entry = dict((str(key), value if isinstance(value, int) else str(value)) for key, value in entry.items())
+        self._entries.append(entry)
+        self._by_key[self._key(entry)] = entry
+        self._by_identification.setdefault(entry['identification'], []).append(entry)
+
+    def _remove_entry(self, entry):
+        self._entries.remove(entry)
+        del self._by_key[self._key(entry)]
+        self._by_identification[entry['identification']].remove(entry)
+
+    @staticmethod
+    def _key(entry):
+        return entry['identification'], entry['format'], entry['serial_number'], entry['hash']
+
+    def keys(self):
+        """
+        Return a list of (identification, format, serial number, hash) tuples, one for each curve.
+        """
+        return [self._key(entry) for entry in self._entries]
+
+    def _all_points(self):
+        if self._points is None:
+            self._points = self._file['points']
+        if self._new_points:
+            self._points = np.concatenate([self._points] + self._new_points)
+            self._new_points = []
+        return self._points
+
+    def add(self, curve, serial_number=''):
+        """
+        Add the curve unless an identical one is already stored, and return its key. A stored curve with the same
+        identification, format, and serial number but different points is replaced. Call save() to write the file.
+        """
+        entry = {'identification': curve.identification,
+                 'format': curve.format,
+                 'serial_number': str(serial_number),
+                 'hash': self.curve_hash(curve)}
+        key = self._key(entry)
+        if key not in self._by_key:
+            for older in list(self._by_identification.get(entry['identification'], [])):
+                if self._key(older)[:3] == key[:3]:
+                    self._remove_entry(older)
+            entry['start'] = self._n_points
+            entry['stop'] = self._n_points + curve.sensor.size
+            self._n_points = entry['stop']
+            self._new_points.append(np.column_stack((curve.sensor, curve.temperature)))
+            self._add_entry(entry)
+        return key
+
+    def get(self, identification, format=None, serial_number=None, curve_hash=None):
+        """
+        Return the stored curve with the given identification, and the given format, serial number, and hash (see
+        curve_hash()) if these are not None. Raise KeyError if there is no such curve and SIMError if there is more than one. A key returned by
+        add() or keys() can be used as get(*key).
+        """
+        entries = [entry for entry in self._by_identification.get(str(identification).upper(), [])
+                   if (format is None or entry['format'] == str(format)) and
+                   (serial_number is None or entry['serial_number'] == str(serial_number)) and
+                   (curve_hash is None or entry['hash'] == str(curve_hash))]
+        if not entries:
+            raise KeyError("No curve {} in {}".format(identification, self.filename))
+        if len(entries) > 1:
+            raise SIMError("{} curves match {}; specify the format or serial number.".format(len(entries),
+                                                                                              identification))
+        entry = entries[0]
+        points = self._all_points()[entry['start']:entry['stop']]
+        return CalibrationCurve(points[:, 0], points[:, 1], entry['identification'], entry['format'])
+
+    def import_directory(self, directory, format='0', extension='.txt', serial_number=''):
+        """
+        Add every curve file in the directory that load_curve() can read, and return a list of their keys. Files that
+        cannot be read are skipped with a warning.
+        """
+        keys = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(extension):
+                try:
+                    curve = load_curve(os.path.join(directory, filename), format)
+                except (IOError, OSError, ValueError) as e:
+                    warnings.warn("Skipped curve file {}: {}".format(filename, e))
+                    continue
+                keys.append(self.add(curve, serial_number))
+        return keys
+
+    def save(self):
+        """
+        Write all of the curves to the file, leaving out the points of curves that were replaced.
+        """
+        all_points = self._all_points()
+        pieces = []
+        self._n_points = 0
+        for entry in self._entries:
+            pieces.append(all_points[entry['start']:entry['stop']])
+            entry['start'], entry['stop'] = self._n_points, self._n_points + entry['stop'] - entry['start']
+            self._n_points = entry['stop']
+        points = np.concatenate(pieces) if pieces else np.empty((0, 2))
+        self._points = points
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(self.filename, 'wb') as f:
+            np.savez(f, points=points, index=np.array(json.dumps(self._entries)))
@@ -0,0 +1,137 @@
+"""
+This module contains classes that hold data streamed from instruments by a reader thread.
+"""
+from __future__ import division
+import threading
+import numpy as np
+
+
+class RingBuffer(object):
+    """
+    This class is a preallocated, fixed-capacity buffer of timestamped rows of data that one thread writes and
+    another thread reads.
+
+    Reading returns every row written since the previous read. If the writer gets more than capacity rows ahead of the
+    reader, the oldest unread rows are overwritten and counted in the overruns attribute.
+    """
+
+    def __init__(self, capacity, n_columns, dtype=np.float64):
+        self.capacity = int(capacity)
+        self.n_columns = int(n_columns)
+        self._timestamps = np.empty(self.capacity, dtype=np.float64)
+        self._data = np.empty((self.capacity, self.n_columns), dtype=dtype)
+        self._lock = threading.Lock()
+        self._written = 0  # The total number of rows ever written.
+        self._read = 0  # The total number of rows ever read or overwritten before being read.
+        self.overruns = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._written - self._read
+
+    def write(self, timestamps, data):
+        """
+        Append rows to the buffer.
+
+        :param timestamps: a one-dimensional array of length n.
+        :param data: an array of shape (n, n_columns).
+        """
+        timestamps = np.asarray(timestamps)
+        data = np.asarray(data).reshape(-1, self.n_columns)
+        n = timestamps.size
+        if n > self.capacity:
+            with self._lock:
+                self._written += n - self.capacity
+            timestamps = timestamps[-self.capacity:]
+            data = data[-self.capacity:]
+            n = self.capacity
+        with self._lock:
+            start = self._written % self.capacity
+            first = min(n, self.capacity - start)
+            self._timestamps[start:start + first] = timestamps[:first]
+            self._data[start:start + first] = data[:first]
+            self._timestamps[:n - first] = timestamps[first:]
+            self._data[:n - first] = data[first:]
+            self._written += n
+            lost = self._written - self._read - self.capacity
+            if lost > 0:
+                self.overruns += lost
+                self._read += lost
+
+    def read(self):
+        """
+        Return all rows written since the previous read, without blocking.
+
+        :return: a one-dimensional array of timestamps and an array of shape (n, n_columns) containing copies of the
+          unread rows.
+        """
+        with self._lock:
+            n = self._written - self._read
+            indices = np.arange(self._read, self._written) % self.capacity
+            self._read += n
+            return self._timestamps[indices], self._data[indices]
+
+
+class ColumnStore(object):
+    """
+    This class is a growable buffer of timestamped rows of data that one thread appends to and other threads read.
+
+    Unlike RingBuffer, it keeps every row: the arrays double in size when they fill, so appending costs amortized
+    constant time. Rows are numbered from zero in the order they were appended, and read() returns copies of any range.
+    """
+
+    def __init__(self, n_columns, initial_capacity=1024, dtype=np.float64):
+        self.n_columns = int(n_columns)
+        self._timestamps = np.empty(int(initial_capacity), dtype=np.float64)
+        self._data = np.empty((int(initial_capacity), self.n_columns), dtype=dtype)
+        self._lock = threading.Lock()
+        self._length = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._length
+
+    def _grow(self, minimum_capacity):
+        capacity = max(minimum_capacity, 2 * self._timestamps.size)
+        timestamps = np.empty(capacity, dtype=self._timestamps.dtype)
+        data = np.empty((capacity, self.n_columns), dtype=self._data.dtype)
+        timestamps[:self._length] = self._timestamps[:self._length]
+        data[:self._length] = self._data[:self._length]
+        self._timestamps, self._data = timestamps, data
+
+    def append(self, timestamps, data):
+        """
+        Append rows to the store.
+
+        :param timestamps: a scalar or a one-dimensional array of length n.
+        :param data: an array that can be reshaped to (n, n_columns).
+        """
+        timestamps = np.atleast_1d(timestamps)
+        data = np.asarray(data).reshape(-1, self.n_columns)
+        n = timestamps.size
+        with self._lock:
+            if self._length + n > self._timestamps.size:
+                self._grow(self._length + n)
+            self._timestamps[self._length:self._length + n] = timestamps
+            self._data[self._length:self._length + n] = data
+            self._length += n
+
+    def read(self, start=0, stop=None):
+        """
+        Return copies of rows start through stop - 1, or through the last row if stop is None.
+
+        :return: a one-dimensional array of timestamps and an array of shape (n, n_columns).
+        """
+        with self._lock:
+            if stop is None or stop > self._length:
+                stop = self._length
+            return self._timestamps[start:stop].copy(), self._data[start:stop].copy()
+
+    def latest(self):
+        """
+        Return the timestamp and data of the last row, or None if the store is empty.
+        """
+        with self._lock:
+            if not self._length:
+                return None
+            return self._timestamps[self._length - 1], self._data[self._length - 1].copy()